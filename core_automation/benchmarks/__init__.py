@@ -0,0 +1 @@
+# core_automation/benchmarks/__init__.py
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: backport_benchmark.py
+########################################################"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+
+from core_automation.modules import backport_examples, backport_install, versions
+from core_automation.modules.release_tree import ReleaseTree
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESOURCES_DIR = os.path.join(ROOT_DIR, "core_automation", "tests", "resources")
+RELEASE_DIR = "strimzi-benchmark"
+BRANCH_NAME = "amqstreams27-dev"
+
+# Fixture trees with examples/ and install/ dirs, the test resources if present, else the repository's own
+def get_source_dir(source_dir=None):
+    if source_dir:
+        return source_dir
+    if os.path.isdir(os.path.join(RESOURCES_DIR, "examples")) and os.path.isdir(os.path.join(RESOURCES_DIR, "install")):
+        return RESOURCES_DIR
+    return ROOT_DIR
+
+
+# Prefix of the i-th copy of a top level dir in the synthetic release, the first copy keeps the real layout
+def get_copy_dir(top_dir, i):
+    return top_dir if i == 0 else f"{top_dir}/copy-{i}"
+
+
+# Builds a release archive with `scale` copies of the examples and install trees, returns the number of files
+def create_release_archive(source_dir, archive_path, scale):
+    files = 0
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for top_dir in ["examples", "install"]:
+            for root, dirs, names in os.walk(os.path.join(source_dir, top_dir)):
+                for name in names:
+                    file_path = os.path.join(root, name)
+                    relative_path = os.path.relpath(file_path, os.path.join(source_dir, top_dir))
+                    for i in range(scale):
+                        archive.write(file_path, f"{RELEASE_DIR}/{get_copy_dir(top_dir, i)}/{relative_path}")
+                        files += 1
+    return files
+
+
+# Bytes passed to write() by this process, None where /proc isn't available
+def get_bytes_written():
+    try:
+        with open("/proc/self/io", 'r') as io_stats:
+            for line in io_stats:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def get_max_rss_kb():
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+class Benchmark:
+    """Runs pipeline stages and records their duration and bytes written."""
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.stages = []
+
+    def run(self, name, function, *args, **kwargs):
+        if self.trace_allocations:
+            tracemalloc.start()
+        bytes_written = get_bytes_written()
+        start = time.perf_counter()
+        # Stages print progress per file, keep it out of the results
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        stage = {
+            "name": name,
+            "seconds": round(seconds, 6),
+            "bytes_written": None if bytes_written is None else get_bytes_written() - bytes_written,
+        }
+        if self.trace_allocations:
+            stage["peak_allocated_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.stages.append(stage)
+        print(f"{name}: {seconds:.3f}s", file=sys.stderr)
+        return result
+
+
+# Same rules main.py applies to the examples
+def transform_examples(tree, context):
+    example_rules = backport_examples.create_example_rules(context.kafka_version_to_replace,
+                                                           context.kafka_version_replacement)
+    return (tree.transform("examples/*.yaml", example_rules.apply)
+            + tree.transform("examples/README.md", backport_examples.create_readme_rules().apply))
+
+
+# Same deployment transforms main.py applies, for every copy of the install tree
+def transform_install(tree, context, scale):
+    transforms = {}
+    for i in range(scale):
+        transforms.update(backport_install.create_install_transforms(context, get_copy_dir("install", i)))
+    return tree.transform_paths(transforms)
+
+
+def commit_tree(tree, dest_dir):
+    return (tree.commit("examples", os.path.join(dest_dir, "examples"), exclude=["README.md"])
+            + tree.commit("install", os.path.join(dest_dir, "install")))
+
+
+# Runs the in-memory backport stages of main.py on a synthetic release `scale` times the size of the fixtures
+def run_benchmark(scale=1, source_dir=None, trace_allocations=False):
+    source_dir = get_source_dir(source_dir)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        context = versions.create_release_context(BRANCH_NAME, datetime(2024, 8, 1))
+    benchmark = Benchmark(trace_allocations)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        archive_path = os.path.join(work_dir, RELEASE_DIR + ".zip")
+        files = create_release_archive(source_dir, archive_path, scale)
+        downstream_dir = os.path.join(work_dir, "downstream")
+
+        tree = benchmark.run("extract", ReleaseTree.from_archive, archive_path, ["examples/*", "install/*"])
+        benchmark.run("hash", tree.hashes)
+        benchmark.run("examples_transform", transform_examples, tree, context)
+        benchmark.run("install_transform", transform_install, tree, context, scale)
+        benchmark.run("copy", commit_tree, tree, downstream_dir)
+        # Second copy finds every destination up to date
+        benchmark.run("copy_unchanged", commit_tree, tree, downstream_dir)
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "files": files,
+            "archive_bytes": os.path.getsize(archive_path),
+            # Peak of the whole process, ru_maxrss can't be attributed to single stages
+            "max_rss_kb": get_max_rss_kb(),
+            "stages": benchmark.stages,
+        }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory backport stages of core_automation/main.py")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Number of copies of the fixture examples and install trees in the release")
+    parser.add_argument("--source-dir", help="Directory with examples/ and install/ fixture trees "
+                                             "(default: tests/resources, or the repository root)")
+    parser.add_argument("--trace-allocations", action="store_true",
+                        help="Record peak Python allocations per stage with tracemalloc (slower)")
+    parser.add_argument("--output", help="Write the results to this JSON file instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmark(args.scale, args.source_dir, args.trace_allocations)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print("Results written to", args.output, file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
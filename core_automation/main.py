@@ -2,99 +2,246 @@
 """########################################################
  FILE: main.py
 ########################################################"""
+import argparse
+import functools
+import multiprocessing
 import os
-from modules import backport_examples, backport_install, versions
-
-def get_paths(target_strimzi_version):
-    """Helper function to build commonly used paths."""
-    base_dir = f"strimzi-{target_strimzi_version}"
-    current_dir = os.path.dirname(os.path.abspath(__file__))
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from modules import backport_examples, backport_install, console, pipeline, tree_diff, versions
+from modules.manifest import BackportManifest
+from modules.release_cache import ReleaseCache
+from modules.release_tree import ReleaseTree
+# Same module instance the modules count into
+from core_automation.modules import instrumentation
+
+DOWNSTREAM_ROOT = ".."
+MANIFEST_NAME = ".backport-manifest.json"
+
+def get_destinations(root=DOWNSTREAM_ROOT):
+    """Helper function to return the downstream directory of each backported release directory."""
     return {
-        'example_dir': os.path.join(base_dir, "examples"),
-        'full_example_dir': f"{base_dir}/examples",
-        'base_dir': base_dir,
-        'full_base_dir': os.path.join(current_dir, base_dir),
-        'example_dir_to_compare': "../examples"
+        "examples": os.path.join(root, "examples"),
+        "install": os.path.join(root, "install"),
     }
 
-def get_file_and_directory_deletions(target_strimzi_version):
-    """Helper function to return files and directories that need to be deleted."""
-    base_dir = f"strimzi-{target_strimzi_version}"
-
-    files = [
-        os.path.join(base_dir, "examples/security/keycloak-authorization/README.md"),
-        os.path.join(base_dir, "examples/connect/kafka-connect-build.yaml"),
-        os.path.join(base_dir, "examples/kafka/kafka-with-node-pools.yaml"),
-        os.path.join(base_dir, "CHANGELOG.md"),
+DESTINATIONS = get_destinations()
+
+def get_destination(path, destinations=DESTINATIONS):
+    """Helper function to map a release path to its downstream file, None if it isn't copied downstream."""
+    top_dir, _, relative_path = path.partition("/")
+    if path == "examples/README.md":
+        return None
+    return os.path.join(destinations[top_dir], relative_path)
+
+def get_process_context():
+    """Helper function to return a start method for worker processes that doesn't fork the running threads."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+def get_extraction_filters():
+    """Helper function to return the release archive members to extract, relative to the release root."""
+    include = [
+        "examples/*",
+        "install/*",
     ]
 
-    directories = [
-        os.path.join(base_dir, "docs"),
-        os.path.join(base_dir, "install/drain-cleaner/certmanager"),
-        os.path.join(base_dir, "install/drain-cleaner/kubernetes"),
+    exclude = [
+        "examples/security/keycloak-authorization/README.md",
+        "examples/connect/kafka-connect-build.yaml",
+        "examples/kafka/kafka-with-node-pools.yaml",
+        "install/drain-cleaner/certmanager/*",
+        "install/drain-cleaner/kubernetes/*",
+        "install/canary/*",
     ]
 
-    return files, directories
+    return include, exclude
 
-def backport_example_files(target_strimzi_version, kafka_version_to_replace, kafka_version_replacement):
+def backport_example_files(context, tree, executor=None, destinations=DESTINATIONS):
     """Helper function to handle all backport example operations."""
-    paths = get_paths(target_strimzi_version)
-
-    backport_examples.create_release_url_for_zips(target_strimzi_version)
-    backport_examples.unpack_zips(target_strimzi_version)
-    backport_examples.compare_directory_files(paths['example_dir'], paths['example_dir_to_compare'])
-    backport_examples.update_yaml_files(paths['full_example_dir'], kafka_version_to_replace, kafka_version_replacement)
-
-    files, directories = get_file_and_directory_deletions(target_strimzi_version)
-
-    backport_examples.delete_file(*files)
-    backport_examples.update_example_dir_readme(paths['full_example_dir'], 'README.md')
-    backport_examples.copy_directory_excluding_readme("examples", "examples", paths['base_dir'])
-
-def backport_install_files(target_strimzi_version, target_release_version):
+    example_rules = backport_examples.create_example_rules(context.kafka_version_to_replace,
+                                                           context.kafka_version_replacement)
+    readme_rules = backport_examples.create_readme_rules()
+    with instrumentation.span("transform"):
+        updated = tree.transform("examples/*.yaml", example_rules.apply, executor)
+        updated += tree.transform("examples/README.md", readme_rules.apply, executor)
+    print(f"Updated {updated} example files")
+    example_rules.print_report()
+    readme_rules.print_report()
+    with instrumentation.span("copy"):
+        tree.commit("examples", destinations["examples"], exclude=["README.md"])
+
+def backport_install_files(context, tree, executor=None, destinations=DESTINATIONS):
     """Helper function to handle all backport installation operations."""
-    paths = get_paths(target_strimzi_version)
-
-    file_paths = [
-        "/install/cluster-operator/060-Deployment-strimzi-cluster-operator.yaml",
-        "/install/drain-cleaner/openshift/060-Deployment.yaml",
-        "/install/topic-operator/05-Deployment-strimzi-topic-operator.yaml",
-        "/install/user-operator/05-Deployment-strimzi-user-operator.yaml"
-    ]
-
-    files, directories = get_file_and_directory_deletions(target_strimzi_version)
-
-    backport_install.delete_directory(*directories)
-    backport_install.update_cluster_operator_deployment(f"{paths['full_base_dir']}/{file_paths[0]}", target_release_version)
-
-    # Update deployments
-    deployments = [
-        (file_paths[1], "drain-cleaner", "application"),
-        (file_paths[2], "topic-operator", "infrastructure"),
-        (file_paths[3], "user-operator", "infrastructure")
-    ]
-    for file_path, component, kind in deployments:
-        backport_install.update_deployment(f"{paths['full_base_dir']}{file_path}", target_release_version, component, kind)
-
-    backport_install.delete_excluded_directory('canary', 'install', paths['base_dir'])
-    backport_install.copy_directory("install", "install", paths['base_dir'])
+    transforms = backport_install.create_install_transforms(context)
+    with instrumentation.span("transform"):
+        tree.transform_paths(transforms, executor)
+
+    with instrumentation.span("copy"):
+        tree.commit("install", destinations["install"])
+
+def compare_example_files(tree, upstream_hashes, hash_cache_path, executor=None, dest_dir=DESTINATIONS["examples"]):
+    """Helper function to diff the upstream examples against the downstream examples."""
+    prefix = "examples/"
+    upstream = {path[len(prefix):]: digest for path, digest in upstream_hashes.items() if path.startswith(prefix)}
+
+    # Downstream hashes are cached by size and mtime between runs
+    hash_cache = tree_diff.load_hash_cache(hash_cache_path)
+    downstream = tree_diff.scan_directory(dest_dir, hash_cache, executor)
+    tree_diff.save_hash_cache(hash_cache_path, hash_cache)
+
+    def read_downstream(path):
+        with open(os.path.join(dest_dir, path), 'r') as file:
+            return file.read()
+
+    diff = tree_diff.diff_trees(downstream, upstream, read_downstream, lambda path: tree.read(prefix + path))
+    tree_diff.print_diff(diff, dest_dir, "upstream examples")
+    return diff
+
+def backport(args, cache, context, process_pool=None, root=DOWNSTREAM_ROOT):
+    """Helper function to run the backport from the release archive to the downstream trees under root."""
+    destinations = get_destinations(root)
+    hash_cache_name = "examples-hashes.json"
+    diff_json = args.diff_json
+    if root != DOWNSTREAM_ROOT:
+        # Batch mode, every version has its own downstream trees
+        hash_cache_name = f"examples-hashes-{context.branch_name}.json"
+        diff_json = diff_json and os.path.join(root, os.path.basename(diff_json))
+
+    def fetch():
+        return cache.fetch(context.strimzi_version, backport_examples.create_release_url_for_zips(context.strimzi_version))
+
+    # Load the files we backport into memory straight from the release archive
+    def extract(archive_path):
+        include, exclude = get_extraction_filters()
+        tree = ReleaseTree.from_archive(archive_path, include, exclude)
+        return tree, tree.hashes()
+
+    def diff(extracted):
+        tree, upstream_hashes = extracted
+        diff = compare_example_files(tree, upstream_hashes, os.path.join(cache.cache_dir, hash_cache_name),
+                                     dest_dir=destinations["examples"])
+        if diff_json:
+            tree_diff.write_diff(diff, diff_json)
+
+    # Only transform and copy files that changed since the last backport
+    def plan(extracted):
+        tree, upstream_hashes = extracted
+        manifest = BackportManifest.load(os.path.join(root, MANIFEST_NAME))
+        if args.full:
+            manifest.context = None
+        stale_paths = manifest.stale_paths(upstream_hashes, context,
+                                           functools.partial(get_destination, destinations=destinations))
+        print(f"{len(stale_paths)} files changed since the last backport")
+        # The diff still reads the full tree, only the copies are pruned
+        example_tree, install_tree = tree.select("examples"), tree.select("install")
+        example_tree.retain(stale_paths)
+        install_tree.retain(stale_paths)
+        return manifest, example_tree, install_tree
+
+    def examples(planned):
+        # Regex rewrites hold the GIL, they are faster inline than on a thread pool
+        backport_example_files(context, planned[1], destinations=destinations)
+
+    def install(planned):
+        backport_install_files(context, planned[2], process_pool, destinations)
+
+    def delete(extracted, planned):
+        for path in planned[0].removed_paths(extracted[1]):
+            backport_examples.delete_file(get_destination(path, destinations))
+            instrumentation.count("files_deleted")
+
+    def save(extracted, planned):
+        manifest, example_tree, install_tree = planned
+        manifest.update(context, extracted[1], {**example_tree.hashes(), **install_tree.hashes()})
+        manifest.save()
+
+    # Install files don't depend on the examples, so their round-trips overlap the examples diff and copy.
+    # The diff reads the downstream examples, so it has to finish before they are overwritten or deleted.
+    stages = pipeline.Pipeline()
+    stages.add("download", fetch)
+    stages.add("extract", extract, inputs=["download"])
+    stages.add("diff", diff, inputs=["extract"])
+    stages.add("plan", plan, inputs=["extract"])
+    stages.add("examples", examples, inputs=["plan"], after=["diff"])
+    stages.add("install", install, inputs=["plan"])
+    stages.add("delete", delete, inputs=["extract", "plan"], after=["diff"])
+    stages.add("manifest", save, inputs=["extract", "plan"], after=["examples", "install", "delete"])
+    try:
+        stages.run()
+    finally:
+        stages.print_trace()
+
+def backport_batch(args, cache, contexts, process_pool=None):
+    """Helper function to backport several product versions in parallel, each into <output dir>/<branch>."""
+    def backport_version(context):
+        root = os.path.join(args.output_dir, context.branch_name)
+        os.makedirs(root, exist_ok=True)
+        # Versions run concurrently, every line they print is prefixed with their branch
+        console.PREFIX.set(f"[{context.branch_name}] ")
+        with instrumentation.span(context.branch_name):
+            backport(args, cache, context, process_pool, root)
+        return root
+
+    # The release cache, the workers and the parsed document cache of each worker are shared by all versions
+    with console.prefixed_stdout(), ThreadPoolExecutor(len(contexts)) as executor:
+        for context, root in zip(contexts, executor.map(backport_version, contexts)):
+            print(f"Backported Strimzi {context.strimzi_version} for {context.branch_name} to {root}")
+
+def get_batch_branches(args):
+    """Helper function to return the branches requested for batch mode, product versions map to their dev branch."""
+    branches = list(args.branches or [])
+    branches += [f"amqstreams{product_version}-dev" for product_version in args.product_versions or []]
+    return list(dict.fromkeys(branches))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backport examples and install files from an upstream Strimzi release")
+    parser.add_argument("--cache-dir", help="Directory for cached release archives (default: $STRIMZI_RELEASE_CACHE "
+                                            "or ~/.cache/amqstreams-backport)")
+    parser.add_argument("--offline", action="store_true", help="Only use cached release archives, never download")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Number of workers for file transforms (default: number of CPUs, 1 disables pools)")
+    parser.add_argument("--full", action="store_true",
+                        help="Transform and copy every file, ignoring the manifest of the last backport")
+    parser.add_argument("--diff-json", help="Write the diff of upstream and downstream examples to this JSON file")
+    parser.add_argument("--branches", nargs="+", metavar="BRANCH",
+                        help="Batch mode: backport the product versions of these branches instead of the active one")
+    parser.add_argument("--product-versions", nargs="+", type=int, metavar="VERSION",
+                        help="Batch mode: backport these product versions, e.g. 26 27")
+    parser.add_argument("--output-dir", default="batch",
+                        help="Batch mode: directory with the downstream tree of each branch, e.g. git worktrees "
+                             "named after the branches (default: batch)")
+    return parser.parse_args()
 
 def main():
     """Main entry point"""
-    target_product_version = versions.get_product_version(versions.get_branch_name())
-    target_strimzi_version = versions.get_target_strimzi_version(target_product_version)
-    target_release_version = versions.get_target_micro_release_version()
-
-    kafka_version_to_replace = versions.get_kafka_version_to_replace(target_product_version)
-    kafka_version_replacement = versions.get_kafka_version_replacement(target_product_version)
-
-    backport_example_files(target_strimzi_version, kafka_version_to_replace, kafka_version_replacement)
-    backport_install_files(target_strimzi_version, target_release_version)
-
-    # Clean up created upstream resources
-    strimzi_dir = f"strimzi-{target_strimzi_version}"
-    backport_examples.delete_created_upstream_resources(strimzi_dir)
-
+    args = parse_args()
+    # Profilers and the metrics summary are enabled through AUTOMATION_PROFILE and AUTOMATION_METRICS_PATH
+    instrumentation.INSTRUMENTATION.start()
+    cache = ReleaseCache(args.cache_dir, offline=args.offline)
+
+    try:
+        # Resolve branch and versions once and pass them through every stage
+        branches = get_batch_branches(args)
+        contexts = [versions.create_release_context(branch) for branch in branches]
+        if not contexts:
+            contexts.append(versions.get_release_context())
+
+        def run(process_pool=None):
+            if branches:
+                backport_batch(args, cache, contexts, process_pool)
+            else:
+                backport(args, cache, contexts[0], process_pool)
+
+        if args.jobs > 1:
+            # Processes for the CPU bound ruamel round-trips. Workers start lazily while pipeline and batch
+            # threads run, so they are never forked from this multithreaded process.
+            with ProcessPoolExecutor(args.jobs, mp_context=get_process_context()) as process_pool:
+                run(process_pool)
+        else:
+            run()
+    finally:
+        instrumentation.INSTRUMENTATION.finish()
 
 if __name__ == "__main__":
     main()
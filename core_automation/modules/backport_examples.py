@@ -4,8 +4,9 @@
 ########################################################"""
 import os
 import shutil
-import urllib.request
-import zipfile
+
+from core_automation.modules import tree_diff
+from core_automation.modules.rewrite import RewriteRules
 
 
 # Create a URL for downloading the zip
@@ -13,44 +14,37 @@ def create_release_url_for_zips(release):
     return "https://github.com/strimzi/strimzi-kafka-operator/releases/download/" + release + "/strimzi-" + release + ".zip"
 
 
-# Unpack the zip locally, into our local example - elsewhere
-def unpack_zips(release):
-    url = create_release_url_for_zips(release)
-    contents = urllib.request.urlopen(url).read()
-    with open("../strimzi.zip", 'wb') as file:
-        file.write(contents)
-    with zipfile.ZipFile("../strimzi.zip", 'r') as strimzizip:
-        strimzizip.extractall(".")
+# Compare upstream files with downstream files, returns the diff from downstream to upstream
+def compare_directory_files(dir_path1, dir_path2, executor=None):
+    for dir_path in [dir_path1, dir_path2]:
+        if not os.path.isdir(dir_path):
+            print(f"Error: directory not found: {dir_path}")
+            return None
 
+    def reader(root):
+        def read(path):
+            with open(os.path.join(root, path), 'r') as f:
+                return f.read()
+        return read
 
-# Compare number of files from upstream to downstream
-def compare_directory_files(dir_path1, dir_path2):
-    try:
-        files_in_dir1 = os.listdir(dir_path1)
-        files_in_dir2 = os.listdir(dir_path2)
-        num_files_dir1 = len(files_in_dir1)
-        num_files_dir2 = len(files_in_dir2)
-        print(f"Number of files in {dir_path1}: {num_files_dir1}")
-        print(f"Number of files in {dir_path2}: {num_files_dir2}")
-        if num_files_dir1 == num_files_dir2:
-            print("Both directories have the same number of files.")
-        else:
-            print("The number of files in the directories is different.")
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
+    diff = tree_diff.diff_trees(tree_diff.scan_directory(dir_path2, executor=executor),
+                                tree_diff.scan_directory(dir_path1, executor=executor),
+                                reader(dir_path2), reader(dir_path1))
+    tree_diff.print_diff(diff, dir_path2, dir_path1)
+    return diff
+
+
+# Rewrite rules for the example YAML files
+def create_example_rules(version_to_replace, replacement):
+    return RewriteRules().replace("kafka-version", version_to_replace, str(replacement))
 
 
-def update_yaml_files(directory, version_to_replace, replacement):
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".yaml"):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                content = content.replace(version_to_replace, str(replacement))
-                print(version_to_replace, str(replacement))
-                with open(file_path, 'w') as f:
-                    f.write(content)
+# Rewrite rules for the examples README
+def create_readme_rules():
+    return (RewriteRules()
+            .replace("branding", 'Strimzi', 'Red Hat Streams for Apache Kafka')
+            .replace("branding-lowercase", 'strimzi', 'Red Hat Streams for Apache Kafka ')
+            .remove_line("jmx-trans", '* JMX Trans deployment'))
 
 
 # String replacement in files for Streams
@@ -59,9 +53,7 @@ def update_example_dir_readme(examples_dir, file_name):
     try:
         with open(readme_file_path, 'r') as f:
             content = f.read()
-        content = content.replace('Strimzi', 'Red Hat Streams for Apache Kafka').replace('strimzi',
-                                                                                         'Red Hat Streams for Apache Kafka ')
-        content = content.replace('* JMX Trans deployment', '')
+        content = create_readme_rules().apply(content)
         with open(readme_file_path, 'w') as f:
             f.write(content)
         print(f'Replacement and removal in {readme_file_path} completed successfully.')
@@ -79,48 +71,6 @@ def delete_file(*file_paths):
             print(f'Error deleting file {file_path}: {e}')
 
 
-def delete_directory(*file_paths):
-    for file_path in file_paths:
-        try:
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-                print(f'Successfully deleted file: {file_path}')
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-                print(f'Successfully deleted directory and its contents: {file_path}')
-            else:
-                print(f'File or directory not found: {file_path}')
-        except OSError as e:
-            print(f'Error deleting file or directory {file_path}: {e}')
-
-
-def copy_directory_excluding_readme(source_name, dest_name, strimzi_dir):
-    source_dir = os.path.join(strimzi_dir, source_name)
-    dest_dir = f'../{dest_name}'
-    try:
-        # Create the destination directory if it doesn't exist
-        os.makedirs(dest_dir, exist_ok=True)
-
-        # Iterate over the items in the source directory
-        for item in os.listdir(source_dir):
-            source_item = os.path.join(source_dir, item)
-            dest_item = os.path.join(dest_dir, item)
-
-            # Skip README.md
-            if item == 'README.md':
-                continue
-
-            # Copy files or directories
-            if os.path.isdir(source_item):
-                shutil.copytree(source_item, dest_item, dirs_exist_ok=True)
-            else:
-                shutil.copy2(source_item, dest_item)
-
-        print(f'{source_name} directory copied to {dest_name} successfully, excluding README.md.')
-    except Exception as e:
-        print(f'Error copying {source_name} directory to {dest_name}:', e)
-
-
 # delete imported upstream resources
 def delete_created_upstream_resources(strimzi_dir):
     strimzi_zip = "../strimzi.zip"
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: console.py
+########################################################"""
+import contextlib
+import contextvars
+import sys
+import threading
+
+# Prefix of every line printed in the current context, e.g. the branch a batch thread backports
+PREFIX = contextvars.ContextVar("console_prefix", default="")
+
+
+class PrefixedStream:
+    """Text stream writing whole lines, each prefixed with the PREFIX of the writing context.
+
+    Lines are buffered per thread, so output of concurrent threads never
+    interleaves within a line.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def write(self, text):
+        buffered = getattr(self.local, "buffer", "") + text
+        *lines, self.local.buffer = buffered.split("\n")
+        if lines:
+            prefix = PREFIX.get()
+            with self.lock:
+                self.stream.write("".join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        buffered = getattr(self.local, "buffer", "")
+        if buffered:
+            self.local.buffer = ""
+            with self.lock:
+                self.stream.write(PREFIX.get() + buffered)
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# Prefix lines printed to stdout with PREFIX while the context is active
+@contextlib.contextmanager
+def prefixed_stdout():
+    stdout = sys.stdout
+    sys.stdout = PrefixedStream(stdout)
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout.flush()
+        sys.stdout = stdout
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: container_patch.py
+########################################################"""
+import copy
+
+
+def create_env_var(name, value):
+    return {"name": name, "value": value}
+
+
+class EnvPatch:
+    """Declarative patch of a container's env list.
+
+    The list is indexed by name once and rebuilt once, keeping the original
+    order of untouched entries. Inserting or appending a variable that
+    already exists only sets its value, so applying a patch again doesn't
+    add duplicates.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.inserts = {}
+        self.appends = []
+        self.removals = set()
+
+    # Set the value of an existing variable, missing variables are left alone
+    def set(self, name, value):
+        self.values[name] = value
+        return self
+
+    def insert_after(self, anchor, name, value):
+        self.inserts.setdefault(anchor, []).append(name)
+        self.values[name] = value
+        return self
+
+    def append(self, name, value):
+        self.appends.append(name)
+        self.values[name] = value
+        return self
+
+    def remove(self, name):
+        self.removals.add(name)
+        return self
+
+    def apply(self, env_vars):
+        index = {}
+        for env_var in env_vars:
+            index.setdefault(env_var["name"], env_var)
+
+        patched = []
+        for env_var in env_vars:
+            name = env_var["name"]
+            if name in self.removals:
+                continue
+            patched.append(env_var)
+            patched.extend(create_env_var(new_name, self.values[new_name])
+                           for new_name in self.inserts.get(name, []) if new_name not in index)
+        patched.extend(create_env_var(name, self.values[name]) for name in self.appends if name not in index)
+
+        for name, value in self.values.items():
+            env_var = index.get(name)
+            if env_var is not None and env_var.get("value") != value:
+                env_var["value"] = value
+        if patched != list(env_vars):
+            env_vars[:] = patched
+        return env_vars
+
+
+class ContainerPatch:
+    """Declarative patch of a container's fields and env list."""
+
+    def __init__(self):
+        self.fields = {}
+        self.removed_fields = []
+        self.env = EnvPatch()
+
+    def set(self, field, value):
+        self.fields[field] = value
+        return self
+
+    def remove(self, field):
+        self.removed_fields.append(field)
+        return self
+
+    def apply(self, container):
+        for field, value in self.fields.items():
+            if container.get(field) != value:
+                container[field] = copy.deepcopy(value)
+        for field in self.removed_fields:
+            if field in container:
+                del container[field]
+        if "env" in container:
+            self.env.apply(container["env"])
+        return container
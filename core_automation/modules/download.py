@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: download.py
+########################################################"""
+import hashlib
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+from core_automation.modules import instrumentation
+
+CHUNK_SIZE = 64 * 1024
+RETRIES = 5
+TIMEOUT = 30
+RELEASE_API_URL = "https://api.github.com/repos/strimzi/strimzi-kafka-operator/releases/tags/"
+
+
+# Default transport, any callable with the same signature returning a response
+# with `status`, `headers` and `read(size)` can be used instead (e.g. in tests)
+def urllib_transport(url, headers, timeout):
+    request = urllib.request.Request(url, headers=headers)
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+# Look up the sha256 digest GitHub publishes for a release asset, None if unavailable
+def get_published_digest(release, asset_name, transport=urllib_transport):
+    try:
+        with transport(RELEASE_API_URL + release, {"Accept": "application/vnd.github+json"}, TIMEOUT) as response:
+            release_info = json.loads(response.read())
+    except (OSError, ValueError) as e:
+        print(f"Could not fetch published digest for {release}: {e}")
+        return None
+    for asset in release_info.get("assets", []):
+        if asset.get("name") == asset_name and asset.get("digest", "").startswith("sha256:"):
+            return asset["digest"].split(":", 1)[1]
+    return None
+
+
+def _hash_existing(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256
+
+
+def _print_progress(url, received, total):
+    if total:
+        print(f"Downloading {url}: {received}/{total} bytes ({received * 100 // total}%)")
+    else:
+        print(f"Downloading {url}: {received} bytes")
+
+
+# Stream url into dest_path chunk by chunk, resuming from a partial
+# download with an HTTP Range request after connection failures.
+# Extra request headers, e.g. cache validators, are sent with every request,
+# on_response is called with each response, e.g. to read its validators.
+def download_file(url, dest_path, expected_sha256=None, transport=urllib_transport,
+                  chunk_size=CHUNK_SIZE, retries=RETRIES, progress=_print_progress, headers=None,
+                  on_response=None):
+    part_path = dest_path + ".part"
+    for attempt in range(1, retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        try:
+            with transport(url, request_headers, TIMEOUT) as response:
+                if on_response:
+                    on_response(response)
+                if offset and response.status != 206:
+                    # Server ignored the range, start from scratch
+                    offset = 0
+                sha256 = _hash_existing(part_path) if offset else hashlib.sha256()
+                length = response.headers.get("Content-Length")
+                total = offset + int(length) if length else None
+                received = offset
+                reported = None
+                with open(part_path, 'ab' if offset else 'wb') as file:
+                    for chunk in iter(lambda: response.read(chunk_size), b""):
+                        file.write(chunk)
+                        sha256.update(chunk)
+                        received += len(chunk)
+                        # Report progress in 10% steps (or per MiB without a known length)
+                        step = received * 10 // total if total else received >> 20
+                        if progress and step != reported:
+                            progress(url, received, total)
+                            reported = step
+                if total is not None and received < total:
+                    raise ConnectionError(f"Connection closed after {received} of {total} bytes")
+            break
+        except OSError as e:
+            if offset and isinstance(e, urllib.error.HTTPError) and e.code == 416:
+                # Range starts past the end, the part is already complete, e.g. the process was killed
+                # before renaming it. Promote it if it matches the expected digest, otherwise start over.
+                sha256, received = _hash_existing(part_path), offset
+                if expected_sha256 and sha256.hexdigest() == expected_sha256:
+                    break
+                print(f"Discarding partial download of {url}, restarting")
+                os.remove(part_path)
+                continue
+            # Client errors won't go away by retrying
+            if attempt == retries or (isinstance(e, urllib.error.HTTPError) and e.code < 500):
+                raise
+            print(f"Download of {url} interrupted ({e}), retrying ({attempt}/{retries})")
+            time.sleep(attempt)
+    else:
+        raise ConnectionError(f"Download of {url} didn't complete after {retries} attempts")
+
+    digest = sha256.hexdigest()
+    if expected_sha256 and digest != expected_sha256:
+        os.remove(part_path)
+        raise ValueError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {digest}")
+    os.replace(part_path, dest_path)
+    instrumentation.count("bytes_downloaded", received)
+    return digest
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: instrumentation.py
+########################################################"""
+import contextlib
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Summary file written when the run finishes, OpenMetrics text for .prom/.txt paths, JSON otherwise
+METRICS_PATH_ENV = "AUTOMATION_METRICS_PATH"
+# Comma separated profilers to enable: cprofile, tracemalloc
+PROFILE_ENV = "AUTOMATION_PROFILE"
+PROFILE_PATH_ENV = "AUTOMATION_PROFILE_PATH"
+DEFAULT_PROFILE_PATH = "automation.prof"
+METRIC_PREFIX = "automation"
+
+
+class Instrumentation:
+    """Named stage spans and counters of one automation run.
+
+    Spans nest per thread, so a span opened inside another is recorded as
+    "parent/child". Counters are safe to update from worker threads, counts
+    made in worker processes are not collected.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiler = None
+        self.tracing = False
+        self.started = time.time()
+
+    @contextlib.contextmanager
+    def span(self, name):
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        path = "/".join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                self.spans.append({"name": path, "seconds": round(seconds, 6)})
+
+    # Path of the innermost open span of this thread, e.g. for spans of work handed to other threads
+    def current_path(self):
+        return "/".join(self.local.__dict__.get("stack", []))
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    # Enables the profilers requested through the environment
+    def start(self, environ=None):
+        environ = os.environ if environ is None else environ
+        profilers = {name.strip() for name in environ.get(PROFILE_ENV, "").split(",") if name.strip()}
+        if "tracemalloc" in profilers and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+        if "cprofile" in profilers:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def summary(self):
+        with self.lock:
+            totals = {}
+            for span in self.spans:
+                total = totals.setdefault(span["name"], {"seconds": 0.0, "count": 0})
+                total["seconds"] = round(total["seconds"] + span["seconds"], 6)
+                total["count"] += 1
+            summary = {
+                "started": self.started,
+                "seconds": round(time.time() - self.started, 6),
+                "spans": list(self.spans),
+                "stages": totals,
+                "counters": dict(self.counters),
+            }
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            summary["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [{"location": str(stat.traceback), "bytes": stat.size}
+                                    for stat in snapshot.statistics("lineno")[:10]],
+            }
+        return summary
+
+    def to_openmetrics(self, summary):
+        lines = [
+            f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+            f"# UNIT {METRIC_PREFIX}_stage_seconds seconds",
+        ]
+        for name, total in summary["stages"].items():
+            lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{name}"}} {total["seconds"]}')
+        for name, value in sorted(summary["counters"].items()):
+            metric = METRIC_PREFIX + "_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}_total {value}")
+        if "memory" in summary:
+            lines.append(f"# TYPE {METRIC_PREFIX}_peak_allocated_bytes gauge")
+            lines.append(f"{METRIC_PREFIX}_peak_allocated_bytes {summary['memory']['peak_bytes']}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    # Stops the profilers and writes the summary, to the path from the environment if none is given
+    def finish(self, path=None, environ=None):
+        environ = os.environ if environ is None else environ
+        path = path or environ.get(METRICS_PATH_ENV)
+        if self.profiler:
+            self.profiler.disable()
+            profile_path = environ.get(PROFILE_PATH_ENV, DEFAULT_PROFILE_PATH)
+            self.profiler.dump_stats(profile_path)
+            print("Profile written to", profile_path)
+            self.profiler = None
+        summary = self.summary()
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        if path:
+            with open(path, 'w') as file:
+                if path.endswith((".prom", ".txt")):
+                    file.write(self.to_openmetrics(summary))
+                else:
+                    json.dump(summary, file, indent=2)
+            print("Metrics written to", path)
+        return summary
+
+
+# Instrumentation of the current run, shared by all modules
+INSTRUMENTATION = Instrumentation()
+
+
+def span(name):
+    return INSTRUMENTATION.span(name)
+
+
+def count(name, value=1):
+    INSTRUMENTATION.count(name, value)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: manifest.py
+########################################################"""
+import dataclasses
+import hashlib
+import json
+import os
+
+
+def hash_file(file_path):
+    try:
+        with open(file_path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class BackportManifest:
+    """Record of the last backport: upstream and transformed sha256 per release path.
+
+    Lets the next run only transform and copy files whose upstream content
+    changed, and find downstream files whose upstream counterpart was removed.
+    """
+
+    def __init__(self, path, context=None, files=None):
+        self.path = path
+        self.context = context
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+            return cls(path, data.get("context"), data.get("files"))
+        except (FileNotFoundError, ValueError):
+            return cls(path)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"context": self.context, "files": self.files}, file, indent=2, sort_keys=True)
+            file.write("\n")
+        os.replace(tmp_path, self.path)
+
+    # Paths that must be transformed again: new or changed upstream, changed or missing
+    # downstream, or everything when the release context changed since the last run.
+    # get_destination(path) returns the downstream file, or None if it isn't backported.
+    def stale_paths(self, upstream_hashes, context, get_destination):
+        full = self.context != dataclasses.asdict(context)
+        stale = set()
+        for path, upstream_hash in upstream_hashes.items():
+            if get_destination(path) is None:
+                continue
+            entry = self.files.get(path)
+            if (full or entry is None or entry["upstream"] != upstream_hash
+                    or hash_file(get_destination(path)) != entry["transformed"]):
+                stale.add(path)
+        return stale
+
+    # Paths backported last time that no longer exist upstream
+    def removed_paths(self, upstream_hashes):
+        return sorted(path for path in self.files if path not in upstream_hashes)
+
+    def update(self, context, upstream_hashes, transformed_hashes):
+        self.context = dataclasses.asdict(context)
+        files = {path: entry for path, entry in self.files.items() if path in upstream_hashes}
+        for path, transformed_hash in transformed_hashes.items():
+            files[path] = {"upstream": upstream_hashes[path], "transformed": transformed_hash}
+        self.files = files
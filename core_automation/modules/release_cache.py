@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: release_cache.py
+########################################################"""
+import json
+import os
+import threading
+import time
+import urllib.error
+
+from core_automation.modules import download, instrumentation
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "amqstreams-backport")
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+# Published releases don't change, only revalidate entries older than a day
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+class ReleaseCache:
+    """On-disk cache of upstream release archives.
+
+    Archives are stored once per sha256 under `objects/`, `index.json` maps
+    each release version to its digest, validators and last use time.
+    """
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE, max_age=DEFAULT_MAX_AGE, offline=False,
+                 transport=download.urllib_transport):
+        self.cache_dir = cache_dir or os.environ.get("STRIMZI_RELEASE_CACHE", DEFAULT_CACHE_DIR)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.offline = offline
+        self.transport = transport
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        # Releases can be fetched from several threads, e.g. in batch mode. The index is guarded by lock,
+        # each release by its own lock, so a release is only downloaded once however many threads need it.
+        self.lock = threading.Lock()
+        self.release_locks = {}
+        self.in_use = set()
+        os.makedirs(os.path.join(self.cache_dir, "objects"), exist_ok=True)
+
+    def object_path(self, sha256):
+        return os.path.join(self.cache_dir, "objects", sha256 + ".zip")
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_index(self, index):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(index, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, release):
+        entry = self.load_index().get(release)
+        if entry and os.path.exists(self.object_path(entry["sha256"])):
+            return entry
+        return None
+
+    def release_lock(self, release):
+        with self.lock:
+            return self.release_locks.setdefault(release, threading.Lock())
+
+    # Return the path of the cached archive for release, downloading it if needed
+    def fetch(self, release, url):
+        with self.release_lock(release):
+            return self._fetch(release, url)
+
+    def _fetch(self, release, url):
+        entry = self.lookup(release)
+
+        if self.offline:
+            if entry is None:
+                raise FileNotFoundError(f"Release {release} is not cached in {self.cache_dir} (offline mode)")
+            print(f"Using cached {release} archive (offline mode)")
+            instrumentation.count("release_cache_hits")
+        elif entry is None or time.time() - entry["validated"] > self.max_age:
+            entry = self._revalidate(release, url, entry)
+        else:
+            print(f"Using cached {release} archive")
+            instrumentation.count("release_cache_hits")
+
+        entry["last_used"] = time.time()
+        with self.lock:
+            self.in_use.add(release)
+            index = self.load_index()
+            index[release] = entry
+            self._evict(index, keep=self.in_use)
+            self.save_index(index)
+        return self.object_path(entry["sha256"])
+
+    # Download the release, or with a cached entry only if it changed upstream. Either way this is a
+    # single request for the archive, the validators are taken from the response that delivers it.
+    def _revalidate(self, release, url, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        validators = {}
+
+        def record_validators(response):
+            validators.update(etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+
+        tmp_path = os.path.join(self.cache_dir, f"strimzi-{release}.zip")
+        try:
+            sha256 = download.download_file(url, tmp_path, transport=self.transport, headers=headers,
+                                            on_response=record_validators)
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or entry is None:
+                raise
+            print(f"Cached {release} archive is up to date")
+            entry["validated"] = time.time()
+            return entry
+
+        # Only looked up once the archive changed, a 304 needs no verification
+        expected_sha256 = download.get_published_digest(release, os.path.basename(url), self.transport)
+        if expected_sha256 and sha256 != expected_sha256:
+            os.remove(tmp_path)
+            raise ValueError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {sha256}")
+        os.replace(tmp_path, self.object_path(sha256))
+        print(f"Cached {release} archive as {sha256}")
+        instrumentation.count("release_cache_downloads")
+        return dict(validators, sha256=sha256, size=os.path.getsize(self.object_path(sha256)),
+                    validated=time.time())
+
+    # Drop least recently used releases until the cache fits in max_size
+    def _evict(self, index, keep):
+        objects = {entry["sha256"]: entry["size"] for entry in index.values()}
+        total = sum(objects.values())
+        for release in sorted(index, key=lambda r: index[r]["last_used"]):
+            if total <= self.max_size:
+                break
+            if release in keep:
+                continue
+            sha256 = index.pop(release)["sha256"]
+            # Objects may be shared by several releases with identical archives
+            if all(entry["sha256"] != sha256 for entry in index.values()):
+                if os.path.exists(self.object_path(sha256)):
+                    os.remove(self.object_path(sha256))
+                total -= objects[sha256]
+            print(f"Evicted {release} archive from cache")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: release_tree.py
+########################################################"""
+import fnmatch
+import hashlib
+import os
+import zipfile
+
+from core_automation.modules import instrumentation
+
+
+# Check a member path (relative to the release root directory) against include/exclude globs
+def is_member_selected(member_path, include, exclude):
+    return (any(fnmatch.fnmatchcase(member_path, pattern) for pattern in include)
+            and not any(fnmatch.fnmatchcase(member_path, pattern) for pattern in exclude))
+
+
+class ReleaseTree:
+    """In-memory tree of release files keyed by path relative to the release root.
+
+    Files are read once from the archive, transformed in memory and written
+    once to their destination, skipping files whose content is unchanged.
+    """
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+
+    @classmethod
+    def from_archive(cls, archive_path, include=("*",), exclude=()):
+        files = {}
+        with zipfile.ZipFile(archive_path, 'r') as strimzizip:
+            for member in strimzizip.infolist():
+                member_path = member.filename.partition("/")[2]
+                if not member.is_dir() and is_member_selected(member_path, include, exclude):
+                    files[member_path] = strimzizip.read(member)
+        print(f"Loaded {len(files)} files from {archive_path}")
+        instrumentation.count("files_read", len(files))
+        return cls(files)
+
+    def paths(self, pattern="*"):
+        return sorted(path for path in self.files if fnmatch.fnmatchcase(path, pattern))
+
+    def hashes(self):
+        return {path: hashlib.sha256(data).hexdigest() for path, data in self.files.items()}
+
+    # Drop every file not in paths, e.g. files unchanged since the last backport
+    def retain(self, paths):
+        paths = set(paths)
+        self.files = {path: data for path, data in self.files.items() if path in paths}
+
+    # New tree of the files under directory, e.g. to transform examples and install files concurrently
+    def select(self, directory):
+        prefix = directory.rstrip("/") + "/"
+        return ReleaseTree({path: data for path, data in self.files.items() if path.startswith(prefix)})
+
+    def read(self, path):
+        return self.files[path].decode("utf-8")
+
+    def write(self, path, content):
+        self.files[path] = content.encode("utf-8")
+
+    # Apply function(content) -> content to every file matching pattern, returns the number of changed files
+    def transform(self, pattern, function, executor=None):
+        return self.transform_paths({path: function for path in self.paths(pattern)}, executor)
+
+    # Apply a function per path, optionally on a concurrent.futures executor. Results
+    # are applied in path order, so the outcome doesn't depend on the pool size.
+    # Process pools need picklable functions, e.g. functools.partial of module functions.
+    # Paths missing from the tree are skipped.
+    def transform_paths(self, functions, executor=None):
+        paths = sorted(path for path in functions if path in self.files)
+        contents = [self.read(path) for path in paths]
+        if executor is None:
+            results = [functions[path](content) for path, content in zip(paths, contents)]
+        else:
+            futures = [executor.submit(functions[path], content) for path, content in zip(paths, contents)]
+            results = [future.result() for future in futures]
+
+        changed = 0
+        for path, content, new_content in zip(paths, contents, results):
+            if new_content != content:
+                self.write(path, new_content)
+                changed += 1
+        return changed
+
+    # Write the files under source to dest_dir, skipping excluded paths (relative to source)
+    # and files whose destination content is already identical
+    def commit(self, source, dest_dir, exclude=()):
+        prefix = source.rstrip("/") + "/"
+        written = 0
+        for path in self.paths(prefix + "*"):
+            relative_path = path[len(prefix):]
+            if any(fnmatch.fnmatchcase(relative_path, pattern) for pattern in exclude):
+                continue
+            dest_path = os.path.join(dest_dir, relative_path)
+            try:
+                with open(dest_path, 'rb') as file:
+                    if file.read() == self.files[path]:
+                        continue
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, 'wb') as file:
+                file.write(self.files[path])
+            written += 1
+            instrumentation.count("bytes_written", len(self.files[path]))
+        print(f'{source} committed to {dest_dir}: {written} files written.')
+        instrumentation.count("files_written", written)
+        return written
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: rewrite.py
+########################################################"""
+import re
+import threading
+from collections import Counter
+
+
+class RewriteRules:
+    """Set of named substitution rules applied to a file in a single pass.
+
+    All rules are compiled into one alternation, so adding a rule doesn't add
+    another pass over the content. At each position line removals win over
+    literal replacements, and longer literals win over shorter ones.
+    """
+
+    def __init__(self):
+        self.rules = []
+        self.hits = Counter()
+        self._pattern = None
+        self._lock = threading.Lock()
+
+    def replace(self, name, old, new):
+        self.rules.append((name, re.escape(old), new, len(old)))
+        self._pattern = None
+        return self
+
+    # Remove every line containing text, including its line break
+    def remove_line(self, name, text):
+        self.rules.append((name, r"^[^\n]*" + re.escape(text) + r"[^\n]*(?:\n|$)", "", float("inf")))
+        self._pattern = None
+        return self
+
+    def compile(self):
+        if self._pattern is None:
+            ordered = sorted(range(len(self.rules)), key=lambda i: -self.rules[i][3])
+            self._pattern = re.compile("|".join(f"(?P<r{i}>{self.rules[i][1]})" for i in ordered), re.MULTILINE)
+        return self._pattern
+
+    def apply(self, content):
+        if not self.rules:
+            return content
+
+        hits = Counter()
+
+        def substitute(match):
+            name, _, new, _ = self.rules[int(match.lastgroup[1:])]
+            hits[name] += 1
+            return new
+
+        content = self.compile().sub(substitute, content)
+        # apply may run on several threads at once
+        with self._lock:
+            self.hits.update(hits)
+        return content
+
+    def print_report(self):
+        for name in dict.fromkeys(rule[0] for rule in self.rules):
+            print(f"Rule {name}: {self.hits[name]} replacements")
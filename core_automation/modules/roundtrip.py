@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: roundtrip.py
+########################################################"""
+import copy
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from ruamel.yaml import YAML
+from ruamel.yaml.representer import RoundTripRepresenter
+
+CACHE_SIZE = 64
+
+
+class MultilineRepresenter(RoundTripRepresenter):
+    """Round-trip representer writing multiline strings as literal blocks.
+
+    Registered on this subclass only, so other YAML instances are unaffected.
+    """
+
+
+def represent_multiline_str(representer, data):
+    if '\n' in data:
+        return representer.represent_scalar(tag='tag:yaml.org,2002:str', value=data, style='|')
+    return representer.represent_scalar(tag='tag:yaml.org,2002:str', value=data)
+
+
+MultilineRepresenter.add_representer(str, represent_multiline_str)
+
+
+# Order preserving plain copy of a document, to tell whether an edit changed any node
+def snapshot(data):
+    if isinstance(data, dict):
+        return [(key, snapshot(value)) for key, value in data.items()]
+    if isinstance(data, list):
+        return [snapshot(value) for value in data]
+    return data
+
+
+class RoundTripEngine:
+    """Loads, edits and dumps YAML manifests preserving quotes and comments.
+
+    Every dump uses its own YAML instance configured from the arguments, so
+    dumper settings never leak between calls. Parsed documents are cached by
+    content hash and edits that leave every node unchanged return the
+    original content without dumping.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.parse_count = 0
+        self.dump_count = 0
+
+    @staticmethod
+    def create_yaml(default_style=None):
+        yaml = YAML()
+        yaml.Representer = MultilineRepresenter
+        yaml.preserve_quotes = True
+        yaml.default_style = default_style
+        yaml.indent(mapping=2, sequence=4, offset=2)
+        return yaml
+
+    # Returns a private copy of the parsed document, callers are free to modify it
+    def load(self, content):
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self.lock:
+            document = self.cache.get(key)
+            if document is not None:
+                self.cache.move_to_end(key)
+        if document is None:
+            document = RoundTripEngine.create_yaml().load(content)
+            with self.lock:
+                self.parse_count += 1
+                self.cache[key] = document
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return copy.deepcopy(document)
+
+    def dump(self, data, default_style=None):
+        stream = io.StringIO()
+        RoundTripEngine.create_yaml(default_style).dump(data, stream)
+        with self.lock:
+            self.dump_count += 1
+        return stream.getvalue()
+
+    # Applies edit(data) to the document of content and returns the new content
+    def edit(self, content, edit, default_style=None):
+        data = self.load(content)
+        before = snapshot(data)
+        edit(data)
+        if snapshot(data) == before:
+            return content
+        return self.dump(data, default_style)
+
+
+# Engine shared by the manifest transforms of this process
+ENGINE = RoundTripEngine()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: tree_diff.py
+########################################################"""
+import hashlib
+import json
+import os
+
+from ruamel.yaml import YAML
+from ruamel.yaml.error import YAMLError
+
+from core_automation.modules import instrumentation
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_hash_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_hash_cache(cache_path, cache):
+    with open(cache_path, 'w') as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+
+
+# Return {relative path: sha256} for every file under root. Entries of cache
+# ({relative path: [size, mtime_ns, sha256]}) with a matching size and mtime are
+# reused without hashing, the cache is updated in place. Hashing runs on
+# executor when given (hashlib releases the GIL, so threads scale).
+def scan_directory(root, cache=None, executor=None):
+    cache = {} if cache is None else cache
+    hashes = {}
+    to_hash = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            relative_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+            stat = os.stat(file_path)
+            entry = cache.get(relative_path)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                hashes[relative_path] = entry[2]
+            else:
+                to_hash.append((relative_path, file_path, stat))
+
+    file_paths = [file_path for _, file_path, _ in to_hash]
+    digests = executor.map(hash_file, file_paths) if executor else map(hash_file, file_paths)
+    for (relative_path, _, stat), digest in zip(to_hash, digests):
+        hashes[relative_path] = digest
+        cache[relative_path] = [stat.st_size, stat.st_mtime_ns, digest]
+
+    for relative_path in set(cache) - set(hashes):
+        del cache[relative_path]
+    instrumentation.count("files_hashed", len(to_hash))
+    return hashes
+
+
+# Check whether two YAML documents (or multi-document streams) hold the same data,
+# ignoring key order, quoting, comments and indentation
+def yaml_equal(content1, content2):
+    loader = YAML(typ="safe", pure=True)
+    try:
+        return list(loader.load_all(content1)) == list(loader.load_all(content2))
+    except YAMLError:
+        return False
+
+
+# Diff two trees given as {relative path: sha256}. read_old/read_new(path) return
+# file contents, used to tell YAML files that only differ in formatting apart.
+def diff_trees(old_hashes, new_hashes, read_old, read_new):
+    diff = {
+        "added": sorted(set(new_hashes) - set(old_hashes)),
+        "removed": sorted(set(old_hashes) - set(new_hashes)),
+        "modified": [],
+        "reformatted": [],
+        "unchanged": 0,
+    }
+    for path in sorted(set(old_hashes) & set(new_hashes)):
+        if old_hashes[path] == new_hashes[path]:
+            diff["unchanged"] += 1
+        elif path.endswith((".yaml", ".yml")) and yaml_equal(read_old(path), read_new(path)):
+            diff["reformatted"].append(path)
+        else:
+            diff["modified"].append(path)
+    return diff
+
+
+def print_diff(diff, old_name, new_name):
+    print(f"Comparing {old_name} with {new_name}: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+          f"{len(diff['modified'])} modified, {len(diff['reformatted'])} reformatted only, "
+          f"{diff['unchanged']} unchanged")
+    for key in ["added", "removed", "modified"]:
+        for path in diff[key]:
+            print(f"  {key}: {path}")
+
+
+def write_diff(diff, output_path):
+    with open(output_path, 'w') as file:
+        json.dump(diff, file, indent=2)
+        file.write("\n")
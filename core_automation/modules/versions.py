@@ -2,7 +2,10 @@
 """########################################################
  FILE: versions.py
 ########################################################"""
+import datetime
 import re
+from dataclasses import dataclass
+
 import git
 
 # Determine current branch name from active repo
@@ -40,14 +43,87 @@ def get_kafka_version_replacement(product_version):
 
 
 # Determine target Streams Version
-def get_target_streams_minor_version():
-    kafka_version = str(get_kafka_version_replacement(get_product_version(get_branch_name())))
+def get_target_streams_minor_version(product_version=None):
+    if product_version is None:
+        product_version = get_product_version(get_branch_name())
+    kafka_version = str(get_kafka_version_replacement(product_version))
     kafka_version = "2" + kafka_version[1:]  # Replace the first digit with 2
     return kafka_version
 
 
-def get_target_micro_release_version():
-    release_version = get_target_streams_minor_version()
+def get_target_micro_release_version(product_version=None):
+    release_version = get_target_streams_minor_version(product_version)
     if not release_version.endswith(".0"):
         release_version += ".0"  # Add .0 if it's not already there
     return release_version
+
+
+# Determine year and quarter of the given date
+def get_year_and_quarter(date):
+    return date.year, (date.month - 1) // 3 + 1
+
+
+# Determine the year and quarter preceding the given one
+def get_previous_year_and_quarter(year, quarter):
+    if quarter == 1:
+        return year - 1, 4
+    return year, quarter - 1
+
+
+@dataclass(frozen=True)
+class ReleaseContext:
+    """Versions of a single backport run, resolved once from the active branch."""
+    branch_name: str
+    product_version: int
+    strimzi_version: str
+    streams_version: str
+    release_version: str
+    kafka_version_to_replace: str
+    kafka_version_replacement: float
+    current_kafka_version: str
+    target_kafka_version: str
+    current_kafka_registry_version: str
+    target_kafka_registry_version: str
+    current_year: int
+    current_quarter: int
+    last_year: int
+    last_quarter: int
+
+    @property
+    def current_release_quarter(self):
+        return f"{self.last_year}.Q{self.last_quarter}"
+
+    @property
+    def target_release_quarter(self):
+        return f"{self.current_year}.Q{self.current_quarter}"
+
+
+# Build the release context for a branch; the date defaults to today
+def create_release_context(branch_name, date=None):
+    product_version = get_product_version(branch_name)
+    kafka_version_to_replace = get_kafka_version_to_replace(product_version)
+    kafka_version_replacement = get_kafka_version_replacement(product_version)
+    current_year, current_quarter = get_year_and_quarter(date or datetime.datetime.now())
+    last_year, last_quarter = get_previous_year_and_quarter(current_year, current_quarter)
+    return ReleaseContext(
+        branch_name=branch_name,
+        product_version=product_version,
+        strimzi_version=get_target_strimzi_version(product_version),
+        streams_version=get_target_streams_minor_version(product_version),
+        release_version=get_target_micro_release_version(product_version),
+        kafka_version_to_replace=kafka_version_to_replace,
+        kafka_version_replacement=kafka_version_replacement,
+        current_kafka_version=f"{kafka_version_to_replace}.0",
+        target_kafka_version=f"{kafka_version_replacement}.0",
+        current_kafka_registry_version=str(kafka_version_to_replace).replace(".", ""),
+        target_kafka_registry_version=str(kafka_version_replacement).replace(".", ""),
+        current_year=current_year,
+        current_quarter=current_quarter,
+        last_year=last_year,
+        last_quarter=last_quarter,
+    )
+
+
+# Build the release context from the active git branch
+def get_release_context(date=None):
+    return create_release_context(get_branch_name(), date)
@@ -3,6 +3,7 @@
  FILE: test_backport.py
 ########################################################"""
 import os
+import tempfile
 import unittest
 from unittest.mock import patch
 from core_automation.modules import backport_examples
@@ -16,18 +17,20 @@ class TestBackportExampleAutomation(unittest.TestCase):
         expected_url = "https://github.com/strimzi/strimzi-kafka-operator/releases/download/0.38.0/strimzi-0.38.0.zip"
         self.assertEqual(release_url, expected_url)
 
-    @patch("os.listdir")
-    def test_compare_directory_files_equal(self, mock_listdir):
-        mock_listdir.side_effect = [
-            ["file1.txt", "file2.txt", "file3.txt"],
-            ["file1.txt", "file2.txt", "file3.txt"]
-        ]
-        with patch("builtins.print") as mock_print:
-            backport_examples.compare_directory_files("dir_path1", "dir_path2")
-        # Asserting that the print calls contain the expected output
-        mock_print.assert_any_call("Number of files in dir_path1: 3")
-        mock_print.assert_any_call("Number of files in dir_path2: 3")
-        mock_print.assert_any_call("Both directories have the same number of files.")
+    def test_compare_directory_files(self):
+        with tempfile.TemporaryDirectory() as upstream_dir, tempfile.TemporaryDirectory() as downstream_dir:
+            for root, files in [(upstream_dir, {"a.yaml": "a: 1\nb: 2\n", "new.yaml": "c: 1\n"}),
+                                (downstream_dir, {"a.yaml": "b: 2\na: 1\n", "old.yaml": "d: 1\n"})]:
+                for name, content in files.items():
+                    with open(os.path.join(root, name), 'w') as f:
+                        f.write(content)
+            with patch("builtins.print") as mock_print:
+                diff = backport_examples.compare_directory_files(upstream_dir, downstream_dir)
+        self.assertEqual(diff["added"], ["new.yaml"])
+        self.assertEqual(diff["removed"], ["old.yaml"])
+        self.assertEqual(diff["reformatted"], ["a.yaml"])
+        self.assertEqual(diff["modified"], [])
+        mock_print.assert_any_call("  added: new.yaml")
 
     def test_string_replacement(self):
         examples_dir = "examples"
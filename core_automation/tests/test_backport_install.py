@@ -2,15 +2,22 @@
 """########################################################
  FILE: test_backport_install.py
 ########################################################"""
+import os
+import shutil
+import tempfile
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 
 import yaml
 
+from core_automation.modules import versions
 from core_automation.modules.backport_install import (update_deployment,
                                                       update_cluster_operator_deployment,
                                                       get_current_year_and_quarter, get_last_year_and_quarter)
 
+INSTALL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../install/")
+
 
 def _load_yaml_data(file_path):
     with open(file_path, 'r') as file:
@@ -27,6 +34,7 @@ class TestBackportExampleAutomation(unittest.TestCase):
     YEAR_AND_QUARTER_VERSION = "2024.Q3"
 
     def setUp(self):
+        self.context = versions.create_release_context("amqstreams27-dev", datetime(2024, 8, 1))
         self.USER_OPERATOR_DEPLOYMENT_FILE = self.RESOURCES_PATH + "test.05-Deployment-strimzi-user-operator.yaml"
         self.TOPIC_OPERATOR_DEPLOYMENT_FILE = self.RESOURCES_PATH + "test.05-Deployment-strimzi-topic-operator.yaml"
         self.CLUSTER_OPERATOR_DEPLOYMENT_FILE = self.RESOURCES_PATH + "test.060-Deployment-strimzi-cluster-operator.yaml"
@@ -40,7 +48,7 @@ class TestBackportExampleAutomation(unittest.TestCase):
         self.assertEqual(label_field["rht.prod_ver"], self.YEAR_AND_QUARTER_VERSION)
 
     def test_update_cluster_operator_deployment(self):
-        update_cluster_operator_deployment(self.CLUSTER_OPERATOR_DEPLOYMENT_FILE, self.STRIMZI_VERSION)
+        update_cluster_operator_deployment(self.CLUSTER_OPERATOR_DEPLOYMENT_FILE, self.context)
         yaml_data = _load_yaml_data(self.CLUSTER_OPERATOR_DEPLOYMENT_FILE)
         env_field = yaml_data["spec"]["template"]["spec"]["containers"][0]["env"][7]["value"]
         expected_image = f"{self.COMMON_REGISTRY_URL}strimzi-rhel9-operator:{self.STRIMZI_VERSION}"
@@ -48,24 +56,46 @@ class TestBackportExampleAutomation(unittest.TestCase):
         self._assert_yaml_fields(yaml_data, expected_image)
 
     def test_update_user_deployment(self):
-        update_deployment(self.USER_OPERATOR_DEPLOYMENT_FILE, self.STRIMZI_VERSION, "user-operator", "infrastructure")
+        update_deployment(self.USER_OPERATOR_DEPLOYMENT_FILE, self.context, "user-operator", "infrastructure")
         yaml_data = _load_yaml_data(self.USER_OPERATOR_DEPLOYMENT_FILE)
         expected_image = f"{self.COMMON_REGISTRY_URL}strimzi-rhel9-operator:{self.STRIMZI_VERSION}"
         self._assert_yaml_fields(yaml_data, expected_image)
 
     def test_update_topic_deployment(self):
-        update_deployment(self.TOPIC_OPERATOR_DEPLOYMENT_FILE, self.STRIMZI_VERSION, "topic-operator", "infrastructure")
+        update_deployment(self.TOPIC_OPERATOR_DEPLOYMENT_FILE, self.context, "topic-operator", "infrastructure")
         yaml_data = _load_yaml_data(self.TOPIC_OPERATOR_DEPLOYMENT_FILE)
         expected_image = f"{self.COMMON_REGISTRY_URL}strimzi-rhel9-operator:{self.STRIMZI_VERSION}"
         self._assert_yaml_fields(yaml_data, expected_image)
 
     def test_update_drain_cleaner_deployment(self):
-        update_deployment(self.DRAIN_CLEANER_OPENSHIFT_DEPLOYMENT_FILE, self.STRIMZI_VERSION, "drain-cleaner",
+        update_deployment(self.DRAIN_CLEANER_OPENSHIFT_DEPLOYMENT_FILE, self.context, "drain-cleaner",
                           "application")
         yaml_data = _load_yaml_data(self.DRAIN_CLEANER_OPENSHIFT_DEPLOYMENT_FILE)
         expected_image = f"{self.COMMON_REGISTRY_URL}drain-cleaner-rhel9:{self.STRIMZI_VERSION}"
         self._assert_yaml_fields(yaml_data, expected_image)
 
+    @patch("git.Repo")
+    def test_git_consulted_once_per_run(self, mock_repo):
+        mock_repo.return_value.active_branch.name = "amqstreams27-dev"
+        deployments = [
+            ("cluster-operator/060-Deployment-strimzi-cluster-operator.yaml", None, None),
+            ("drain-cleaner/openshift/060-Deployment.yaml", "drain-cleaner", "application"),
+            ("topic-operator/05-Deployment-strimzi-topic-operator.yaml", "topic-operator", "infrastructure"),
+            ("user-operator/05-Deployment-strimzi-user-operator.yaml", "user-operator", "infrastructure")
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            context = versions.get_release_context()
+            for file_path, component, kind in deployments:
+                tmp_file = os.path.join(tmp_dir, os.path.basename(file_path))
+                shutil.copy(INSTALL_PATH + file_path, tmp_file)
+                if component is None:
+                    update_cluster_operator_deployment(tmp_file, context)
+                else:
+                    update_deployment(tmp_file, context, component, kind)
+
+        self.assertEqual(mock_repo.call_count, 1)
+        self.assertEqual(context.release_version, self.STRIMZI_VERSION)
+
     def test_get_last_year_and_quarter(self):
         current_date = datetime.now()
         current_year = current_date.year
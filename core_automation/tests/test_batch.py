@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_batch.py
+########################################################"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime
+
+# main.py runs as a script from core_automation/ and imports its modules as `modules`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+from modules import versions  # noqa: E402
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RELEASE_FILES = [
+    "examples/README.md",
+    "examples/kafka/kafka-persistent.yaml",
+    "install/cluster-operator/060-Deployment-strimzi-cluster-operator.yaml",
+    "install/user-operator/05-Deployment-strimzi-user-operator.yaml",
+]
+BRANCHES = ["amqstreams27-dev", "amqstreams28-dev"]
+
+
+class FakeCache:
+    """Release cache serving one local archive for every release."""
+
+    def __init__(self, cache_dir, archive_path):
+        self.cache_dir = cache_dir
+        self.archive_path = archive_path
+        self.releases = []
+
+    def fetch(self, release, url):
+        self.releases.append(release)
+        return self.archive_path
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.tmp_dir.name, "strimzi.zip")
+        with zipfile.ZipFile(self.archive_path, 'w') as archive:
+            for path in RELEASE_FILES:
+                archive.write(os.path.join(ROOT_DIR, path), "strimzi-0.40.0/" + path)
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        os.makedirs(self.cache_dir)
+        self.output_dir = os.path.join(self.tmp_dir.name, "batch")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_batch_branches(self):
+        args = argparse.Namespace(branches=["amqstreams27-dev", "amqstreams26-dev"], product_versions=[27, 28])
+        self.assertEqual(main.get_batch_branches(args), ["amqstreams27-dev", "amqstreams26-dev", "amqstreams28-dev"])
+        self.assertEqual(main.get_batch_branches(argparse.Namespace(branches=None, product_versions=None)), [])
+
+    def test_get_destination(self):
+        destinations = main.get_destinations("batch/amqstreams27-dev")
+        self.assertEqual(main.get_destination("install/cluster-operator/a.yaml", destinations),
+                         os.path.join("batch/amqstreams27-dev", "install", "cluster-operator/a.yaml"))
+        self.assertEqual(main.get_destination("examples/kafka/a.yaml", destinations),
+                         os.path.join("batch/amqstreams27-dev", "examples", "kafka/a.yaml"))
+        self.assertIsNone(main.get_destination("examples/README.md", destinations))
+
+    def test_backport_batch(self):
+        args = argparse.Namespace(full=False, diff_json="diff.json", output_dir=self.output_dir)
+        cache = FakeCache(self.cache_dir, self.archive_path)
+        contexts = [versions.create_release_context(branch, datetime(2024, 11, 1)) for branch in BRANCHES]
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.backport_batch(args, cache, contexts)
+
+        self.assertEqual(sorted(cache.releases), sorted(context.strimzi_version for context in contexts))
+        with open(os.path.join(ROOT_DIR, RELEASE_FILES[2]), 'r') as file:
+            upstream_deployment = file.read()
+        for branch in BRANCHES:
+            root = os.path.join(self.output_dir, branch)
+            # Every version has its own downstream trees, manifest, diff and hash cache
+            self.assertTrue(os.path.exists(os.path.join(root, "examples", "kafka", "kafka-persistent.yaml")))
+            self.assertFalse(os.path.exists(os.path.join(root, "examples", "README.md")))
+            with open(os.path.join(root, "install", "cluster-operator",
+                                   "060-Deployment-strimzi-cluster-operator.yaml"), 'r') as file:
+                self.assertNotEqual(file.read(), upstream_deployment)
+            self.assertTrue(os.path.exists(os.path.join(root, main.MANIFEST_NAME)))
+            self.assertTrue(os.path.exists(os.path.join(root, "diff.json")))
+            self.assertTrue(os.path.exists(os.path.join(self.cache_dir, f"examples-hashes-{branch}.json")))
+
+        # Lines of concurrent versions never interleave and carry their branch
+        lines = output.getvalue().splitlines()
+        for branch in BRANCHES:
+            self.assertIn(f"[{branch}] 3 files changed since the last backport", lines)
+        updated_lines = [line for line in lines if "example files" in line]
+        self.assertEqual(len(updated_lines), len(BRANCHES))
+        for line in updated_lines:
+            self.assertRegex(line, r"^\[amqstreams2[78]-dev\] Updated \d+ example files$")
+
+    def test_backport_batch_skips_unchanged_files(self):
+        args = argparse.Namespace(full=False, diff_json=None, output_dir=self.output_dir)
+        cache = FakeCache(self.cache_dir, self.archive_path)
+        contexts = [versions.create_release_context(branch, datetime(2024, 11, 1)) for branch in BRANCHES]
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.backport_batch(args, cache, contexts)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.backport_batch(args, cache, contexts)
+
+        for branch in BRANCHES:
+            self.assertIn(f"[{branch}] 0 files changed since the last backport", output.getvalue().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_benchmark.py
+########################################################"""
+import unittest
+
+from core_automation.benchmarks import backport_benchmark
+
+
+class TestBackportBenchmark(unittest.TestCase):
+
+    def test_run_benchmark(self):
+        results = backport_benchmark.run_benchmark(scale=2, source_dir=backport_benchmark.ROOT_DIR)
+
+        self.assertEqual(results["scale"], 2)
+        self.assertGreater(results["files"], 0)
+        self.assertEqual([stage["name"] for stage in results["stages"]],
+                         ["extract", "hash", "examples_transform", "install_transform", "copy", "copy_unchanged"])
+        for stage in results["stages"]:
+            self.assertGreaterEqual(stage["seconds"], 0)
+        self.assertGreater(results["max_rss_kb"], 0)
+        stages = {stage["name"]: stage for stage in results["stages"]}
+        if stages["copy"]["bytes_written"] is not None:
+            self.assertGreater(stages["copy"]["bytes_written"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_container_patch.py
+########################################################"""
+import os
+import unittest
+from collections import Counter
+from datetime import datetime
+
+import yaml
+
+from core_automation.modules import versions
+from core_automation.modules.backport_install import update_cluster_operator_deployment_content
+from core_automation.modules.container_patch import ContainerPatch, EnvPatch
+
+INSTALL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../install/")
+
+
+def _names(env_vars):
+    return [env_var["name"] for env_var in env_vars]
+
+
+class TestContainerPatch(unittest.TestCase):
+
+    def setUp(self):
+        self.env_vars = [
+            {"name": "A", "value": "a"},
+            {"name": "B", "value": "b"},
+            {"name": "C", "value": "c"},
+            {"name": "D", "value": "d"},
+        ]
+
+    def test_env_patch(self):
+        patch = EnvPatch().set("A", "a2").set("MISSING", "x").insert_after("A", "A1", "a1") \
+                          .remove("B").remove("C").append("E", "e").append("D", "d2")
+
+        patch.apply(self.env_vars)
+
+        # Consecutive entries are removed, appending an existing variable only sets its value
+        self.assertEqual(_names(self.env_vars), ["A", "A1", "D", "E"])
+        self.assertEqual([env_var["value"] for env_var in self.env_vars], ["a2", "a1", "d2", "e"])
+
+        patch.apply(self.env_vars)
+        self.assertEqual(_names(self.env_vars), ["A", "A1", "D", "E"])
+
+    def test_container_patch(self):
+        container = {"image": "old", "args": ["--x"], "env": self.env_vars}
+
+        ContainerPatch().set("image", "new").set("command", ["/application"]).remove("args").apply(container)
+
+        self.assertEqual(container, {"image": "new", "env": self.env_vars, "command": ["/application"]})
+
+    def test_cluster_operator_deployment_idempotent(self):
+        context = versions.create_release_context("amqstreams27-dev", datetime(2024, 8, 1))
+        with open(os.path.join(INSTALL_PATH, "cluster-operator/060-Deployment-strimzi-cluster-operator.yaml"), 'r') as file:
+            content = update_cluster_operator_deployment_content(file.read(), context)
+
+        self.assertEqual(update_cluster_operator_deployment_content(content, context), content)
+        env_vars = yaml.safe_load(content)["spec"]["template"]["spec"]["containers"][0]["env"]
+        duplicates = [name for name, count in Counter(_names(env_vars)).items() if count > 1]
+        self.assertEqual(duplicates, [])
+        self.assertNotIn("STRIMZI_DEFAULT_KANIKO_EXECUTOR_IMAGE", _names(env_vars))
+
+
+if __name__ == "__main__":
+    unittest.main()
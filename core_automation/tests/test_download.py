@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_download.py
+########################################################"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import urllib.error
+from unittest.mock import patch
+
+from core_automation.modules import download
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, body, status=200, fail_after=None):
+        super().__init__(body)
+        self.status = status
+        self.headers = {"Content-Length": str(len(body))}
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.fail_after is not None and self.tell() >= self.fail_after:
+            raise ConnectionResetError("Connection reset by peer")
+        return super().read(size)
+
+
+class FakeTransport:
+    """Stand-in for the release HTTP server, honouring Range requests and
+    resetting the connection after `fail_after` bytes on the first request."""
+
+    def __init__(self, body, fail_after=None, support_range=True):
+        self.body = body
+        self.fail_after = fail_after
+        self.support_range = support_range
+        self.requests = []
+
+    def __call__(self, url, headers, timeout):
+        self.requests.append(headers)
+        fail_after, self.fail_after = self.fail_after, None
+        if "Range" in headers and self.support_range:
+            offset = int(headers["Range"].split("=")[1].rstrip("-"))
+            if offset >= len(self.body):
+                raise urllib.error.HTTPError(url, 416, "Range Not Satisfiable", {}, None)
+            return FakeResponse(self.body[offset:], status=206)
+        return FakeResponse(self.body, fail_after=fail_after)
+
+
+class TestDownload(unittest.TestCase):
+    BODY = os.urandom(300 * 1024)
+    SHA256 = hashlib.sha256(BODY).hexdigest()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dest_path = os.path.join(self.tmp_dir.name, "strimzi.zip")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _read_dest(self):
+        with open(self.dest_path, 'rb') as file:
+            return file.read()
+
+    def test_download_file(self):
+        transport = FakeTransport(self.BODY)
+        digest = download.download_file("url", self.dest_path, self.SHA256, transport, progress=None)
+        self.assertEqual(digest, self.SHA256)
+        self.assertEqual(self._read_dest(), self.BODY)
+        self.assertFalse(os.path.exists(self.dest_path + ".part"))
+
+    @patch("time.sleep")
+    def test_download_file_resumes_after_reset(self, mock_sleep):
+        transport = FakeTransport(self.BODY, fail_after=128 * 1024)
+        download.download_file("url", self.dest_path, self.SHA256, transport, progress=None)
+        self.assertEqual(self._read_dest(), self.BODY)
+        self.assertEqual(transport.requests, [{}, {"Range": f"bytes={128 * 1024}-"}])
+
+    @patch("time.sleep")
+    def test_download_file_restarts_without_range_support(self, mock_sleep):
+        transport = FakeTransport(self.BODY, fail_after=128 * 1024, support_range=False)
+        download.download_file("url", self.dest_path, self.SHA256, transport, progress=None)
+        self.assertEqual(self._read_dest(), self.BODY)
+
+    def _write_part(self, body):
+        with open(self.dest_path + ".part", 'wb') as file:
+            file.write(body)
+
+    def test_download_file_promotes_complete_part(self):
+        # Left behind by a run killed between the last chunk and the rename
+        self._write_part(self.BODY)
+        transport = FakeTransport(self.BODY)
+        digest = download.download_file("url", self.dest_path, self.SHA256, transport, progress=None)
+        self.assertEqual(digest, self.SHA256)
+        self.assertEqual(self._read_dest(), self.BODY)
+        self.assertEqual(transport.requests, [{"Range": f"bytes={len(self.BODY)}-"}])
+
+    def test_download_file_restarts_unverified_complete_part(self):
+        self._write_part(self.BODY + b"stale")
+        transport = FakeTransport(self.BODY)
+        download.download_file("url", self.dest_path, transport=transport, progress=None)
+        self.assertEqual(self._read_dest(), self.BODY)
+        self.assertEqual(transport.requests, [{"Range": f"bytes={len(self.BODY) + 5}-"}, {}])
+
+    def test_download_file_checksum_mismatch(self):
+        transport = FakeTransport(self.BODY)
+        with self.assertRaises(ValueError):
+            download.download_file("url", self.dest_path, "0" * 64, transport, progress=None)
+        self.assertFalse(os.path.exists(self.dest_path))
+        self.assertFalse(os.path.exists(self.dest_path + ".part"))
+
+    def test_get_published_digest(self):
+        release_info = {"assets": [{"name": "strimzi-0.40.0.zip", "digest": "sha256:" + self.SHA256}]}
+        transport = FakeTransport(json.dumps(release_info).encode())
+        self.assertEqual(download.get_published_digest("0.40.0", "strimzi-0.40.0.zip", transport), self.SHA256)
+        self.assertIsNone(download.get_published_digest("0.40.0", "strimzi-0.40.0.tar.gz", transport))
+
+
+if __name__ == '__main__':
+    unittest.main()
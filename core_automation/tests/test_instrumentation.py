@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_instrumentation.py
+########################################################"""
+import json
+import os
+import tempfile
+import unittest
+
+from core_automation.modules.instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_spans_and_counters(self):
+        instrumentation = Instrumentation()
+        with instrumentation.span("install"):
+            with instrumentation.span("transform"):
+                instrumentation.count("files_read", 3)
+            with instrumentation.span("transform"):
+                instrumentation.count("files_read")
+
+        summary = instrumentation.summary()
+
+        self.assertEqual([span["name"] for span in summary["spans"]],
+                         ["install/transform", "install/transform", "install"])
+        self.assertEqual(summary["stages"]["install/transform"]["count"], 2)
+        self.assertEqual(summary["counters"], {"files_read": 4})
+
+    def test_finish_writes_summary(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            environ = {
+                "AUTOMATION_PROFILE": "cprofile,tracemalloc",
+                "AUTOMATION_PROFILE_PATH": os.path.join(tmp_dir, "automation.prof"),
+                "AUTOMATION_METRICS_PATH": os.path.join(tmp_dir, "metrics.json"),
+            }
+            instrumentation = Instrumentation()
+            instrumentation.start(environ)
+            with instrumentation.span("copy"):
+                instrumentation.count("files_written", 2)
+            instrumentation.finish(environ=environ)
+
+            with open(environ["AUTOMATION_METRICS_PATH"], 'r') as file:
+                summary = json.load(file)
+            self.assertEqual(summary["counters"], {"files_written": 2})
+            self.assertIn("peak_bytes", summary["memory"])
+            self.assertTrue(os.path.exists(environ["AUTOMATION_PROFILE_PATH"]))
+
+            metrics_path = os.path.join(tmp_dir, "metrics.prom")
+            instrumentation.finish(metrics_path, environ={})
+            with open(metrics_path, 'r') as file:
+                metrics = file.read()
+            self.assertIn('automation_stage_seconds{stage="copy"}', metrics)
+            self.assertIn("automation_files_written_total 2", metrics)
+            self.assertTrue(metrics.endswith("# EOF\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_manifest.py
+########################################################"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from core_automation.modules import versions
+from core_automation.modules.manifest import BackportManifest, hash_file
+
+
+class TestBackportManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manifest_path = os.path.join(self.tmp_dir.name, "manifest.json")
+        self.context = versions.create_release_context("amqstreams27-dev", datetime(2024, 8, 1))
+        self.upstream_hashes = {"examples/a.yaml": "a1", "examples/b.yaml": "b1", "examples/README.md": "r1"}
+        for name in ["a.yaml", "b.yaml"]:
+            with open(os.path.join(self.tmp_dir.name, name), 'w') as file:
+                file.write(name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _get_destination(self, path):
+        if path.endswith("README.md"):
+            return None
+        return os.path.join(self.tmp_dir.name, os.path.basename(path))
+
+    def _saved_manifest(self):
+        manifest = BackportManifest.load(self.manifest_path)
+        manifest.update(self.context, self.upstream_hashes, {
+            "examples/a.yaml": "1a0fe2e6ec1e4ae0e3ef9c5e2aea4bc4fd1d5ab5cfef9b2a9a0e7ecf1c1a8bc5",
+            "examples/b.yaml": hash_file(self._get_destination("examples/b.yaml"))
+        })
+        manifest.save()
+        return BackportManifest.load(self.manifest_path)
+
+    def test_new_manifest_marks_everything_stale(self):
+        manifest = BackportManifest.load(self.manifest_path)
+        stale = manifest.stale_paths(self.upstream_hashes, self.context, self._get_destination)
+        self.assertEqual(stale, {"examples/a.yaml", "examples/b.yaml"})
+
+    def test_stale_paths(self):
+        manifest = self._saved_manifest()
+        # a.yaml was changed downstream since the last backport, b.yaml is unchanged
+        self.assertEqual(manifest.stale_paths(self.upstream_hashes, self.context, self._get_destination),
+                         {"examples/a.yaml"})
+        # b.yaml changed upstream
+        upstream_hashes = dict(self.upstream_hashes, **{"examples/b.yaml": "b2"})
+        self.assertEqual(manifest.stale_paths(upstream_hashes, self.context, self._get_destination),
+                         {"examples/a.yaml", "examples/b.yaml"})
+
+    def test_context_change_marks_everything_stale(self):
+        manifest = self._saved_manifest()
+        context = versions.create_release_context("amqstreams27-dev", datetime(2024, 11, 1))
+        self.assertEqual(manifest.stale_paths(self.upstream_hashes, context, self._get_destination),
+                         {"examples/a.yaml", "examples/b.yaml"})
+
+    def test_removed_paths(self):
+        manifest = self._saved_manifest()
+        self.assertEqual(manifest.removed_paths({"examples/a.yaml": "a1"}), ["examples/b.yaml"])
+
+
+if __name__ == '__main__':
+    unittest.main()
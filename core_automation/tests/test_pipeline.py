@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_pipeline.py
+########################################################"""
+import os
+import threading
+import unittest
+
+from core_automation.modules.pipeline import Pipeline
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Modules vendored into both automation packages, which can't import each other
+SHARED_MODULES = ["pipeline.py", "instrumentation.py"]
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_inputs_are_passed_in_order(self):
+        pipeline = Pipeline()
+        pipeline.add("a", lambda: 2)
+        pipeline.add("b", lambda: 3)
+        pipeline.add("c", lambda b, a: b - a, inputs=["b", "a"])
+
+        self.assertEqual(pipeline.run()["c"], 1)
+        self.assertEqual({entry["status"] for entry in pipeline.trace}, {"done"})
+
+    def test_independent_stages_run_concurrently(self):
+        # Both stages only finish once the other one started
+        barrier = threading.Barrier(2, timeout=5)
+        pipeline = Pipeline()
+        pipeline.add("examples", barrier.wait)
+        pipeline.add("install", barrier.wait)
+
+        pipeline.run()
+
+        self.assertEqual(len(pipeline.results), 2)
+
+    def test_after_orders_without_passing_results(self):
+        order = []
+        pipeline = Pipeline()
+        pipeline.add("diff", lambda: order.append("diff"))
+        pipeline.add("copy", lambda: order.append("copy"), after=["diff"])
+
+        pipeline.run()
+
+        self.assertEqual(order, ["diff", "copy"])
+
+    def test_failure_skips_dependents(self):
+        def fail():
+            raise RuntimeError("download failed")
+
+        pipeline = Pipeline()
+        pipeline.add("download", fail)
+        pipeline.add("extract", lambda archive: archive, inputs=["download"])
+        pipeline.add("save", lambda: None, after=["extract"])
+        pipeline.add("unrelated", lambda: "done")
+
+        with self.assertRaisesRegex(RuntimeError, "download failed"):
+            pipeline.run()
+
+        statuses = {entry["name"]: entry["status"] for entry in pipeline.trace}
+        self.assertEqual(statuses, {"download": "failed", "extract": "skipped", "save": "skipped",
+                                    "unrelated": "done"})
+
+    def test_unknown_dependencies_are_rejected(self):
+        pipeline = Pipeline()
+        with self.assertRaises(ValueError):
+            pipeline.add("extract", lambda archive: archive, inputs=["download"])
+        pipeline.add("download", lambda: None)
+        with self.assertRaises(ValueError):
+            pipeline.add("download", lambda: None)
+
+    def test_shared_modules_match(self):
+        def read(path):
+            with open(path, 'r') as file:
+                # Only the package of the imports differs
+                return file.read().replace("from core_automation.modules import", "from . import")
+
+        for name in SHARED_MODULES:
+            with self.subTest(name=name):
+                self.assertEqual(read(os.path.join(ROOT_DIR, "core_automation", "modules", name)),
+                                 read(os.path.join(ROOT_DIR, "operator-metadata", "automation", "modules", name)),
+                                 f"{name} differs between core_automation and operator-metadata, change both copies")
+
+
+if __name__ == '__main__':
+    unittest.main()
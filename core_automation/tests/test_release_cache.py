@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_release_cache.py
+########################################################"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+
+from core_automation.modules.release_cache import ReleaseCache
+
+URL = "https://github.com/strimzi/strimzi-kafka-operator/releases/download/0.40.0/strimzi-0.40.0.zip"
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, body, headers):
+        super().__init__(body)
+        self.status = 200
+        self.headers = headers
+
+
+class FakeReleaseServer:
+    """Stand-in for GitHub serving release archives with an ETag."""
+
+    def __init__(self, archives):
+        self.archives = archives
+        self.requests = []
+
+    def __call__(self, url, headers, timeout):
+        self.requests.append((url, headers))
+        if url.endswith(".zip"):
+            body = self.archives[os.path.basename(url)]
+            etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+            if headers.get("If-None-Match") == etag:
+                raise urllib.error.HTTPError(url, 304, "Not Modified", {}, None)
+            return FakeResponse(body, {"Content-Length": str(len(body)), "ETag": etag})
+        # No published digest in the release API response
+        return FakeResponse(b"{}", {})
+
+
+class TestReleaseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = FakeReleaseServer({"strimzi-0.40.0.zip": b"a" * 1000, "strimzi-0.42.0.zip": b"b" * 1000})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _cache(self, **kwargs):
+        return ReleaseCache(self.tmp_dir.name, transport=self.server, **kwargs)
+
+    def test_fetch_downloads_once(self):
+        path = self._cache().fetch("0.40.0", URL)
+        requests_after_download = len(self.server.requests)
+        self.assertEqual(self._cache().fetch("0.40.0", URL), path)
+        self.assertEqual(len(self.server.requests), requests_after_download)
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), b"a" * 1000)
+        self.assertEqual(os.path.basename(path), hashlib.sha256(b"a" * 1000).hexdigest() + ".zip")
+
+    def test_fetch_downloads_with_a_single_archive_request(self):
+        self._cache().fetch("0.40.0", URL)
+        archive_requests = [headers for url, headers in self.server.requests if url == URL]
+        self.assertEqual(archive_requests, [{}])
+        entry = self._cache().lookup("0.40.0")
+        self.assertEqual(entry["etag"], '"' + hashlib.sha256(b"a" * 1000).hexdigest() + '"')
+
+    def test_fetch_downloads_changed_archive_on_revalidation(self):
+        self._cache().fetch("0.40.0", URL)
+        self.server.archives["strimzi-0.40.0.zip"] = b"c" * 1000
+        self.server.requests.clear()
+        path = self._cache(max_age=-1).fetch("0.40.0", URL)
+        # The conditional request itself delivers the new archive
+        archive_requests = [headers for url, headers in self.server.requests if url == URL]
+        self.assertEqual(len(archive_requests), 1)
+        self.assertIn("If-None-Match", archive_requests[0])
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), b"c" * 1000)
+
+    def test_fetch_revalidates_expired_entry(self):
+        self._cache().fetch("0.40.0", URL)
+        self.server.requests.clear()
+        self._cache(max_age=-1).fetch("0.40.0", URL)
+        # A single conditional request answered with 304
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn("If-None-Match", self.server.requests[0][1])
+
+    def test_offline_fails_fast_when_not_cached(self):
+        with self.assertRaises(FileNotFoundError):
+            self._cache(offline=True).fetch("0.40.0", URL)
+        self.assertEqual(self.server.requests, [])
+
+    def test_offline_uses_cached_archive(self):
+        path = self._cache().fetch("0.40.0", URL)
+        self.server.requests.clear()
+        self.assertEqual(self._cache(offline=True).fetch("0.40.0", URL), path)
+        self.assertEqual(self.server.requests, [])
+
+    def test_evicts_least_recently_used(self):
+        old_path = self._cache(max_size=1500).fetch("0.40.0", URL)
+        new_path = self._cache(max_size=1500).fetch("0.42.0", URL.replace("0.40.0", "0.42.0"))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+        self.assertIsNone(self._cache().lookup("0.40.0"))
+
+    def test_keeps_archives_in_use(self):
+        # In batch mode one cache serves every version, an archive another version extracts is never evicted
+        cache = self._cache(max_size=1500)
+        old_path = cache.fetch("0.40.0", URL)
+        new_path = cache.fetch("0.42.0", URL.replace("0.40.0", "0.42.0"))
+        self.assertTrue(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+
+    def test_concurrent_fetches_download_once(self):
+        def slow_server(url, headers, timeout):
+            time.sleep(0.05)
+            return self.server(url, headers, timeout)
+
+        cache = ReleaseCache(self.tmp_dir.name, transport=slow_server)
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(cache.fetch("0.40.0", URL))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(len([url for url, headers in self.server.requests if url == URL]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_release_tree.py
+########################################################"""
+import os
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core_automation.modules.release_tree import ReleaseTree
+
+
+def bump_kafka_version(content):
+    return content.replace("3.7", "3.8")
+
+
+class TestReleaseTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.tmp_dir.name, "strimzi.zip")
+        with zipfile.ZipFile(self.archive_path, 'w') as strimzizip:
+            strimzizip.writestr("strimzi-0.40.0/CHANGELOG.md", "changes")
+            strimzizip.writestr("strimzi-0.40.0/examples/README.md", "Strimzi examples")
+            strimzizip.writestr("strimzi-0.40.0/examples/kafka/kafka.yaml", "version: 3.7.0")
+            strimzizip.writestr("strimzi-0.40.0/examples/bridge/kafka-bridge.yaml", "replicas: 1")
+        self.dest_dir = os.path.join(self.tmp_dir.name, "examples")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_from_archive(self):
+        tree = ReleaseTree.from_archive(self.archive_path, ["examples/*"])
+        self.assertEqual(tree.paths(), ["examples/README.md", "examples/bridge/kafka-bridge.yaml",
+                                        "examples/kafka/kafka.yaml"])
+
+    def test_transform(self):
+        tree = ReleaseTree.from_archive(self.archive_path, ["examples/*"])
+        changed = tree.transform("examples/*.yaml", lambda content: content.replace("3.7", "3.8"))
+        self.assertEqual(changed, 1)
+        self.assertEqual(tree.read("examples/kafka/kafka.yaml"), "version: 3.8.0")
+
+    def test_transform_with_executor(self):
+        expected = ReleaseTree.from_archive(self.archive_path)
+        expected.transform("*", bump_kafka_version)
+        for executor in [ThreadPoolExecutor(4), ProcessPoolExecutor(2)]:
+            with executor:
+                tree = ReleaseTree.from_archive(self.archive_path)
+                self.assertEqual(tree.transform("*", bump_kafka_version, executor), 1)
+                self.assertEqual(tree.files, expected.files)
+
+    def test_commit_only_writes_changed_files(self):
+        tree = ReleaseTree.from_archive(self.archive_path, ["examples/*"])
+        self.assertEqual(tree.commit("examples", self.dest_dir, exclude=["README.md"]), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "README.md")))
+        self.assertEqual(tree.commit("examples", self.dest_dir, exclude=["README.md"]), 0)
+
+        tree.transform("examples/*.yaml", lambda content: content.replace("3.7", "3.8"))
+        self.assertEqual(tree.commit("examples", self.dest_dir, exclude=["README.md"]), 1)
+        with open(os.path.join(self.dest_dir, "kafka/kafka.yaml"), 'r') as file:
+            self.assertEqual(file.read(), "version: 3.8.0")
+
+
+if __name__ == '__main__':
+    unittest.main()
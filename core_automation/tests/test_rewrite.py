@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_rewrite.py
+########################################################"""
+import unittest
+
+from core_automation.modules.rewrite import RewriteRules
+
+
+class TestRewriteRules(unittest.TestCase):
+
+    def test_apply_counts_hits_per_rule(self):
+        rules = RewriteRules().replace("kafka", "3.7", "3.8").replace("branding", "Strimzi", "Streams")
+        content = rules.apply("Strimzi Kafka 3.7\nversion: 3.7.0\n")
+        self.assertEqual(content, "Streams Kafka 3.8\nversion: 3.8.0\n")
+        self.assertEqual(rules.hits["kafka"], 2)
+        self.assertEqual(rules.hits["branding"], 1)
+
+    def test_apply_is_single_pass(self):
+        # Output of one rule is never rewritten by another rule
+        rules = RewriteRules().replace("upper", "Strimzi", "strimzi-downstream").replace("lower", "strimzi", "x")
+        self.assertEqual(rules.apply("Strimzi strimzi"), "strimzi-downstream x")
+
+    def test_longest_literal_wins(self):
+        rules = RewriteRules().replace("short", "3.7", "A").replace("long", "3.7.0", "B")
+        self.assertEqual(rules.apply("3.7 3.7.0"), "A B")
+
+    def test_remove_line(self):
+        rules = RewriteRules().remove_line("jmx", "* JMX Trans deployment").replace("kafka", "Kafka", "K")
+        self.assertEqual(rules.apply("* Kafka\n* JMX Trans deployment\n* Bridge\n"), "* K\n* Bridge\n")
+
+    def test_apply_without_rules(self):
+        self.assertEqual(RewriteRules().apply("content"), "content")
+
+
+if __name__ == '__main__':
+    unittest.main()
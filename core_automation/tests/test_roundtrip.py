@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_roundtrip.py
+########################################################"""
+import os
+import unittest
+from datetime import datetime
+
+from core_automation.modules import versions
+from core_automation.modules.backport_install import (update_cluster_operator_deployment_content,
+                                                      update_deployment_content)
+from core_automation.modules.roundtrip import RoundTripEngine
+
+INSTALL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../install/")
+
+
+def _read(path):
+    with open(os.path.join(INSTALL_PATH, path), 'r') as file:
+        return file.read()
+
+
+class TestRoundTripEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.context = versions.create_release_context("amqstreams27-dev", datetime(2024, 8, 1))
+        self.deployment = _read("topic-operator/05-Deployment-strimzi-topic-operator.yaml")
+
+    def test_output_independent_of_call_order(self):
+        before = update_deployment_content(self.deployment, self.context, "topic-operator", "infrastructure")
+        update_cluster_operator_deployment_content(_read("cluster-operator/060-Deployment-strimzi-cluster-operator.yaml"),
+                                                   self.context)
+        after = update_deployment_content(self.deployment, self.context, "topic-operator", "infrastructure")
+        self.assertEqual(before, after)
+
+    def test_parsed_document_cached(self):
+        engine = RoundTripEngine()
+        data = engine.load(self.deployment)
+        data["metadata"]["name"] = "changed"
+
+        # Changes to a loaded document don't leak into the cache
+        self.assertEqual(engine.load(self.deployment)["metadata"]["name"], "strimzi-topic-operator")
+        self.assertEqual(engine.parse_count, 1)
+
+    def test_unmodified_document_not_dumped(self):
+        engine = RoundTripEngine()
+        self.assertEqual(engine.edit(self.deployment, lambda data: None), self.deployment)
+        self.assertEqual(engine.edit(self.deployment, lambda data: data["metadata"].update(name="strimzi-topic-operator")),
+                         self.deployment)
+        self.assertEqual(engine.dump_count, 0)
+
+        output = engine.edit(self.deployment, lambda data: data["metadata"].update(name="changed"))
+        self.assertIn("name: changed", output)
+        self.assertEqual(engine.dump_count, 1)
+
+    def test_dumper_configuration_isolated(self):
+        engine = RoundTripEngine()
+        data = engine.load("key: value\n")
+        self.assertEqual(engine.dump(data, default_style='"'), '"key": "value"\n')
+        self.assertEqual(engine.dump(data), "key: value\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
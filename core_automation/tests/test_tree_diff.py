@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: test_tree_diff.py
+########################################################"""
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from core_automation.modules import tree_diff
+
+
+class TestTreeDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self._write("kafka/kafka.yaml", "kind: Kafka\nspec:\n  replicas: 3\n")
+        self._write("README.md", "examples")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(os.path.join(self.root, path)), exist_ok=True)
+        with open(os.path.join(self.root, path), 'w') as file:
+            file.write(content)
+
+    def test_scan_directory(self):
+        with ThreadPoolExecutor(2) as executor:
+            hashes = tree_diff.scan_directory(self.root, executor=executor)
+        self.assertEqual(sorted(hashes), ["README.md", "kafka/kafka.yaml"])
+        self.assertEqual(hashes["README.md"], tree_diff.hash_file(os.path.join(self.root, "README.md")))
+
+    def test_scan_directory_reuses_cached_hashes(self):
+        cache = {}
+        hashes = tree_diff.scan_directory(self.root, cache)
+        with patch.object(tree_diff, "hash_file") as mock_hash_file:
+            self.assertEqual(tree_diff.scan_directory(self.root, cache), hashes)
+            mock_hash_file.assert_not_called()
+
+        self._write("README.md", "changed examples")
+        os.remove(os.path.join(self.root, "kafka/kafka.yaml"))
+        hashes = tree_diff.scan_directory(self.root, cache)
+        self.assertEqual(hashes["README.md"], tree_diff.hash_file(os.path.join(self.root, "README.md")))
+        self.assertEqual(sorted(cache), ["README.md"])
+
+    def test_yaml_equal(self):
+        self.assertTrue(tree_diff.yaml_equal("a: 1\nb: [1, 2]\n", "# comment\nb:\n  - 1\n  - 2\na: 1\n"))
+        self.assertFalse(tree_diff.yaml_equal("a: 1\n", "a: 2\n"))
+        self.assertFalse(tree_diff.yaml_equal("a: 1\n", "a: [\n"))
+
+    def test_diff_trees(self):
+        old = {"same.yaml": "1", "format.yaml": "2", "changed.yaml": "3", "removed.yaml": "4"}
+        new = {"same.yaml": "1", "format.yaml": "5", "changed.yaml": "6", "added.yaml": "7"}
+        contents = {"format.yaml": ["a: 1\nb: 2\n", "b: 2\na: 1\n"], "changed.yaml": ["a: 1\n", "a: 2\n"]}
+        diff = tree_diff.diff_trees(old, new, lambda path: contents[path][0], lambda path: contents[path][1])
+        self.assertEqual(diff, {"added": ["added.yaml"], "removed": ["removed.yaml"], "modified": ["changed.yaml"],
+                                "reformatted": ["format.yaml"], "unchanged": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
  FILE: test_versions.py
 ########################################################"""
 import unittest
+from datetime import datetime
 from core_automation.modules import versions
 
 
@@ -52,6 +53,19 @@ class TestVersions(unittest.TestCase):
         actual_kafka_version = versions.get_kafka_version_replacement(product_version)
         self.assertEqual(actual_kafka_version, expected_kafka_version)
 
+    def test_create_release_context(self):
+        context = versions.create_release_context("amqstreams27-dev", datetime(2025, 2, 1))
+        self.assertEqual(context.product_version, 27)
+        self.assertEqual(context.strimzi_version, "0.40.0")
+        self.assertEqual(context.streams_version, "2.8")
+        self.assertEqual(context.release_version, "2.8.0")
+        self.assertEqual(context.current_kafka_version, "3.7.0")
+        self.assertEqual(context.target_kafka_version, "3.8.0")
+        self.assertEqual(context.current_kafka_registry_version, "37")
+        self.assertEqual(context.target_kafka_registry_version, "38")
+        self.assertEqual(context.current_release_quarter, "2024.Q4")
+        self.assertEqual(context.target_release_quarter, "2025.Q1")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1 @@
+# automation/benchmarks/__init__.py
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: bundle_benchmark.py
+########################################################"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from automation.modules import constants
+from automation.modules.bundle_automation import BundleAutomation
+from automation.modules.cluster_service_version import ClusterServiceVersion
+from automation.modules.component_build_info import ComponentBuildInfo, ComponentBuildInfoRegistry
+from automation.tests.fake_koji import FakeKojiSession
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "resources")
+CSV_FILE_PATH = os.path.join(RESOURCES_DIR, "new.format.internal.pull.specs.test.bundle.clusterserviceversion.yaml")
+PRODUCT_VERSION = "2.5.0"
+OLD_TAG = PRODUCT_VERSION + "-1"
+NEW_TAG = PRODUCT_VERSION + "-5"
+KAFKA_IMAGE_ANCHOR = "                  kafka-current-image:"
+KAFKA_IMAGES_ANCHOR = "                  kafka-images: |\n"
+REGISTRY = "registry-proxy.engineering.redhat.com/rh-osbs/amq-streams-"
+
+
+# Kafka image numbers of synthetic related images, clear of the real ones
+def get_extra_kafka_images(count):
+    return [100 + i for i in range(count)]
+
+
+# Scales the test CSV up with `extra_images` additional Kafka related images
+def create_cluster_service_version(extra_images):
+    with open(CSV_FILE_PATH, 'r') as file:
+        data = file.read().rstrip()
+    annotations = "".join(f"                  kafka-{n}-image: {REGISTRY}kafka-{n}-rhel9:{OLD_TAG}\n"
+                          for n in get_extra_kafka_images(extra_images))
+    kafka_images = "".join(f"                    {n}.0.0={REGISTRY}kafka-{n}-rhel9:{OLD_TAG}\n"
+                           for n in get_extra_kafka_images(extra_images))
+    data = data.replace(KAFKA_IMAGE_ANCHOR, annotations + KAFKA_IMAGE_ANCHOR, 1)
+    return data.replace(KAFKA_IMAGES_ANCHOR, KAFKA_IMAGES_ANCHOR + kafka_images, 1)
+
+
+# Build infos of the test components plus one per synthetic Kafka image
+def create_components(extra_images):
+    components = ComponentBuildInfoRegistry.from_directory(RESOURCES_DIR)
+    for n in get_extra_kafka_images(extra_images):
+        package_name = f"amqstreams-kafka-{n}-container"
+        components.add(ComponentBuildInfo(
+            package_name=package_name,
+            nvr=f"{package_name}-{NEW_TAG}",
+            version=PRODUCT_VERSION,
+            release=NEW_TAG.split("-")[-1],
+            pull_specs=(f"<PLACEHOLDER>/rh-osbs/amq-streams-kafka-{n}-rhel8@sha256:{n:064x}",
+                        f"<PLACEHOLDER>/rh-osbs/amq-streams-kafka-{n}-rhel8:{NEW_TAG}"),
+            digest=f"sha256:{n:064x}",
+        ))
+    return components
+
+
+# Brew with `respins` bundle builds of every version up to the product version, all released
+def create_brew_session(respins, latency, versions=3):
+    brew_client = FakeKojiSession(latency=latency)
+    major, minor, micro = PRODUCT_VERSION.split(".")
+    for i in range(versions):
+        version = f"{major}.{int(minor) - versions + 1 + i}.{micro}"
+        for release in range(respins):
+            brew_client.add_build(constants.METADATA_PACKAGE_NAME, version, release, released=True)
+    return brew_client
+
+
+# Runs function `repeat` times with its prints discarded, returns the fastest duration and the last result
+def measure(function, repeat):
+    durations = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            durations.append(time.perf_counter() - start)
+    return min(durations), result
+
+
+def benchmark_bundle_versions(respins, latency, repeat):
+    csv = ClusterServiceVersion(create_cluster_service_version(0))
+    results = []
+    for count in respins:
+        brew_client = create_brew_session(count, latency)
+        seconds, bundle_versions = measure(
+            lambda: BundleAutomation.generate_bundle_version_strings(brew_client, csv, PRODUCT_VERSION), repeat)
+        results.append({
+            "stage": "generate_bundle_version_strings",
+            "respins": count,
+            "seconds": round(seconds, 6),
+            "rpcs": len(brew_client.rpcs) // repeat,
+            "bundle_versions": bundle_versions,
+        })
+    return results
+
+
+def benchmark_pull_specs(images, repeat):
+    results = []
+    for count in images:
+        data = create_cluster_service_version(count)
+        components = create_components(count)
+        seconds, tag_dict = measure(lambda: BundleAutomation.create_tag_dict_from_new_csv_format(
+            ClusterServiceVersion(data), components), repeat)
+        results.append({
+            "stage": "create_tag_dict_from_new_csv_format",
+            "related_images": count,
+            "csv_bytes": len(data),
+            "seconds": round(seconds, 6),
+            "tags": len(tag_dict),
+        })
+
+        bundle_versions = [PRODUCT_VERSION + "-0", PRODUCT_VERSION + "-1"]
+        seconds, output = measure(
+            lambda: BundleAutomation.update_cluster_service_version_data(data, bundle_versions, tag_dict), repeat)
+        results.append({
+            "stage": "update_cluster_service_version_data",
+            "related_images": count,
+            "csv_bytes": len(data),
+            "seconds": round(seconds, 6),
+            "output_bytes": len(output),
+        })
+    return results
+
+
+def run_benchmark(respins=(10, 100, 500), images=(0, 50, 200), latency=0.01, repeat=3):
+    results = benchmark_bundle_versions(respins, latency, repeat) + benchmark_pull_specs(images, repeat)
+    for result in results:
+        scale = result.get("respins", result.get("related_images"))
+        print(f"{result['stage']} [{scale}]: {result['seconds']:.4f}s", file=sys.stderr)
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": latency,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def parse_counts(value):
+    return [int(count) for count in value.split(",")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the bundle automation against a fake Brew")
+    parser.add_argument("--respins", type=parse_counts, default=[10, 100, 500],
+                        help="Comma separated numbers of bundle respins per version in Brew")
+    parser.add_argument("--images", type=parse_counts, default=[0, 50, 200],
+                        help="Comma separated numbers of extra related images in the CSV")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every Brew call")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the fastest is reported")
+    parser.add_argument("--output", help="Write the results to this JSON file instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmark(args.respins, args.images, args.latency, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print("Results written to", args.output, file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
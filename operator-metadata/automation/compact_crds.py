@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+from modules import instrumentation
+from modules.crd_compaction import CrdCompactor, FORMATS
+
+import argparse
+import os
+
+MANIFESTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "manifests"))
+
+def parse_args():
+  parser = argparse.ArgumentParser(description="Write compacted copies of the bundle CRDs")
+  parser.add_argument("--manifests-dir", default=MANIFESTS_DIR,
+                      help="Directory with the *.crd.yaml bundle manifests (default: operator-metadata/manifests)")
+  parser.add_argument("--output-dir", required=True,
+                      help="Directory for the compacted CRDs, must not be the manifests directory")
+  parser.add_argument("--format", choices=FORMATS, default="yaml",
+                      help="yaml keeps block style, min-yaml writes single line YAML and json compact JSON (default: yaml)")
+  parser.add_argument("--no-dedupe", action="store_true",
+                      help="Don't write identical subtrees, e.g. the schemas of several versions, as YAML anchors")
+  parser.add_argument("--strip-descriptions", action="store_true", help="Drop the descriptions of the CRD schemas")
+  parser.add_argument("--report", help="Also write the size report to this JSON file")
+  return parser.parse_args()
+
+def main():
+  args = parse_args()
+  # Profilers and the metrics summary are enabled through AUTOMATION_PROFILE and AUTOMATION_METRICS_PATH
+  instrumentation.INSTRUMENTATION.start()
+  try:
+    compactor = CrdCompactor(args.format, dedupe=not args.no_dedupe, strip_descriptions=args.strip_descriptions)
+    results = compactor.compact_directory(args.manifests_dir, args.output_dir)
+  finally:
+    instrumentation.INSTRUMENTATION.finish()
+
+  CrdCompactor.print_report(results)
+  if args.report:
+    CrdCompactor.write_report(results, args.report)
+
+if __name__ == "__main__":
+  main()
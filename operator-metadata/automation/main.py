@@ -1,39 +1,39 @@
 #!/usr/bin/env python3
+from modules import bundle_update
 from modules import constants
-from modules.file import File
-from modules.bundle_automation import BundleAutomation
+from modules import instrumentation
 
 import koji as brew
 import os
 
-def main():
-  brew_client = brew.ClientSession(os.environ['BREW_URL'])
-
-  cluster_service_version_file = File(os.environ['DIST_GIT_CSV_FILE_PATH'])
-  component_data = BundleAutomation.collect_component_build_info()
-  product_version = BundleAutomation.get_product_version(cluster_service_version_file.data)
-
-  # Get old to new tag mappings
-  tag_dict = BundleAutomation.create_tag_dict_from_new_csv_format(cluster_service_version_file.data, component_data)
-  bundle_versions = BundleAutomation.generate_bundle_version_strings(
-          brew_client, 
-          cluster_service_version_file.data,
-          product_version
-  )
-
-  # Update CSV with new pull_specs + bump bundle version
-  cluster_service_version_file.data = BundleAutomation.update_cluster_service_version_data(cluster_service_version_file.data, bundle_versions, tag_dict)
-  cluster_service_version_file.write(os.environ['DIST_GIT_CSV_FILE_PATH'])
-  cluster_service_version_file.write(os.environ['GIT_HUB_CSV_FILE_PATH'])
+def update_bundle():
+  # Brew sessions for the build index and, with BREW_COMPONENT_FALLBACK, the component lookups
+  stages = bundle_update.create_pipeline(os.environ, lambda opts=None: brew.ClientSession(os.environ['BREW_URL'], opts=opts))
+  try:
+    results = stages.run()
+  finally:
+    stages.print_trace()
 
+  product_version = results["parse"][2]
+  bundle_versions = results["brew_query/bundle_versions"]
   print(
     "Product version:", product_version, 
     "Old bundle version", bundle_versions[constants.OLD_BUNDLE_VERSION_INDEX], 
     "New bundle version:", bundle_versions[constants.NEW_BUNDLE_VERSION_INDEX]
   )
 
+  results["brew_index"].save()
+
   with open("csv_version", 'w') as sources:
     sources.write(bundle_versions[constants.NEW_BUNDLE_VERSION_INDEX])
 
+def main():
+  # Profilers and the metrics summary are enabled through AUTOMATION_PROFILE and AUTOMATION_METRICS_PATH
+  instrumentation.INSTRUMENTATION.start()
+  try:
+    update_bundle()
+  finally:
+    instrumentation.INSTRUMENTATION.finish()
+
 if __name__ == "__main__":
   main()
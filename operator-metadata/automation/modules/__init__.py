@@ -1,4 +1,15 @@
 # automation/modules/__init__.py
+from . import brew_queries
+from . import build_index
 from . import bundle_automation
+from . import bundle_update
+from . import cluster_service_version
+from . import component_build_info
 from . import constants
+from . import crd_compaction
+from . import crd_sync
+from . import csv_rewriter
 from . import file
+from . import instrumentation
+from . import pipeline
+from . import pull_specs
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: brew_queries.py
+########################################################"""
+from . import constants
+from . import instrumentation
+
+
+# Lists builds of a package, latest first. When a version is given only
+# builds of that version are fetched, filtered on the Brew side by NVR pattern
+def list_builds(brew_client, package_name, version=None, state=None):
+    query = {"prefix": package_name, "queryOpts": {"order": "-creation_ts"}}
+    if version is not None:
+        query["pattern"] = package_name + "-" + version + "-*"
+    if state is not None:
+        query["state"] = state
+    builds = brew_client.listBuilds(**query)
+    instrumentation.count("brew_rpcs")
+    return [build for build in builds if version is None or build['version'] == version]
+
+
+# Returns the tag names of each build, fetched in a single multicall round-trip
+def list_tags(brew_client, builds):
+    if not builds:
+        return []
+    with brew_client.multicall(strict=True) as multicall:
+        calls = [multicall.listTags(build['build_id']) for build in builds]
+    instrumentation.count("brew_rpcs")
+    return [[tag['name'] for tag in call.result] for call in calls]
+
+
+def released_builds(brew_client, builds):
+    tags = list_tags(brew_client, builds)
+    return [build for build, build_tags in zip(builds, tags) if constants.RELEASE_TAG in build_tags]
+
+
+# NVR of the latest completed, non source build
+def latest_nvr(builds):
+    return next((build['nvr'] for build in builds
+                 if build['state'] == constants.COMPLETED and "source" not in build['nvr']), None)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: build_index.py
+########################################################"""
+import json
+import time
+
+from . import brew_queries
+
+
+class BuildIndex:
+    """Per-run index of Brew builds, shared by every bundle automation query.
+
+    Builds of each package version are listed once and the tags of all of them
+    are fetched once, afterwards lookups are answered from memory. With a
+    cache_path the index is also kept on disk for ttl seconds, so re-runs in
+    the same pipeline stage don't query Brew at all.
+    """
+
+    def __init__(self, brew_client, cache_path=None, ttl=600):
+        self.brew_client = brew_client
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.builds = {}
+        self.released = {}
+        self.latest_nvrs = {}
+        self.load()
+
+    @staticmethod
+    def of(brew_client):
+        if isinstance(brew_client, BuildIndex):
+            return brew_client
+        return BuildIndex(brew_client)
+
+    @staticmethod
+    def key(package_name, version):
+        return package_name + "-" + version
+
+    def load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r') as file:
+                cache = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+        if time.time() - cache.get("created", 0) <= self.ttl:
+            self.builds = cache["builds"]
+            self.released = {key: set(ids) for key, ids in cache["released"].items()}
+            print("Using cached Brew build index from", self.cache_path)
+
+    def save(self):
+        if not self.cache_path:
+            return
+        cache = {
+            "created": time.time(),
+            "builds": self.builds,
+            "released": {key: sorted(ids) for key, ids in self.released.items()},
+        }
+        with open(self.cache_path, 'w') as file:
+            json.dump(cache, file)
+
+    # Builds of a package version, latest first
+    def get_builds(self, package_name, version):
+        key = BuildIndex.key(package_name, version)
+        if key not in self.builds:
+            self.builds[key] = brew_queries.list_builds(self.brew_client, package_name, version)
+        return self.builds[key]
+
+    def get_released_build_ids(self, package_name, version):
+        key = BuildIndex.key(package_name, version)
+        if key not in self.released:
+            builds = self.get_builds(package_name, version)
+            self.released[key] = {build['build_id'] for build in brew_queries.released_builds(self.brew_client, builds)}
+        return self.released[key]
+
+    def get_latest_nvr(self, package_name, version):
+        key = BuildIndex.key(package_name, version)
+        if key not in self.latest_nvrs:
+            self.latest_nvrs[key] = brew_queries.latest_nvr(self.get_builds(package_name, version))
+        return self.latest_nvrs[key]
+
+    def count_released(self, package_name, version):
+        return len(self.get_released_build_ids(package_name, version))
+
+    def is_released(self, package_name, version):
+        return self.count_released(package_name, version) > 0
@@ -2,11 +2,12 @@
 """########################################################
  FILE: bundle_automation.py
 ########################################################"""
-import yaml
-import os
 import re
-import json
 from . import constants
+from .build_index import BuildIndex
+from .component_build_info import ComponentBuildInfo, ComponentBuildInfoRegistry
+from .cluster_service_version import ClusterServiceVersion
+from .csv_rewriter import CsvRewriter
 
 
 class BundleAutomation:
@@ -15,32 +16,32 @@ class BundleAutomation:
 
     @staticmethod
     def get_product_version(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['spec']['version'].split("-")[0]
 
     @staticmethod
     def get_replace_version(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['spec']['replaces'].split(".v")[-1]
 
     @staticmethod
     def get_bundle_version(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['spec']['version']
 
     @staticmethod
     def get_bundle_name(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['metadata']['name']
 
     @staticmethod
     def get_bundle_deployment_name(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['spec']['install']['spec']['deployments'][BundleAutomation.STRIMZI_DEPLOYMENT]['name']
 
     @staticmethod
     def get_skip_range(data):
-        data = yaml.safe_load(data)
+        data = ClusterServiceVersion.of(data).document
         return data['metadata']['annotations']['olm.skipRange']
 
     @staticmethod
@@ -74,44 +75,26 @@ class BundleAutomation:
 
     @staticmethod
     def is_bundle_released(brew_client, product_version):
-        # Sort to get latest build for version
-        builds = brew_client.listBuilds(prefix=constants.METADATA_PACKAGE_NAME, queryOpts={'order': 'creation_ts'})
-        # Reverse so latest build appear first
-        builds.reverse()
-
-        for build in builds:
-            # Since the builds are in order take the latest build which matches the major and minor version
-            if build['version'] == product_version:
-                if BundleAutomation.is_build_released(brew_client, build):
-                    return True
-        return False
+        return BuildIndex.of(brew_client).is_released(constants.METADATA_PACKAGE_NAME, product_version)
 
     """
     Gets nvr of latest brew build with the specified prefix e.g. amqstreams-operator-container-1.4.0-5
     """
     @staticmethod
     def get_nvr(brew_client, prefix, version):
-        # Sort to get latest build for version
-        builds = brew_client.listBuilds(prefix=prefix, queryOpts={'order': 'creation_ts'})
-        # Reverse so latest build appear first
-        builds.reverse()
-
-        for build in builds:
-            if build['version'] == version and build['state'] == constants.COMPLETED and "source" not in build['nvr']:
-                return build['nvr']
+        nvr = BuildIndex.of(brew_client).get_latest_nvr(prefix, version)
+        if nvr:
+            return nvr
 
         raise ValueError('No NVR found in brew with prefix %s and version %s' % (prefix, version))
 
     @staticmethod
-    def get_digest_from_info(info):
-        data = yaml.safe_load(info)
-        return data["extra"]["image"]["index"]["digests"]["application/vnd.docker.distribution.manifest.list.v2+json"]
-
-    def get_pull_spec_from_info(info):
-        data = yaml.safe_load(info)
-        pull_spec_with_tag=1
-        pull_spec = data["extra"]["image"]["index"]["pull"][pull_spec_with_tag]
-        return pull_spec
+    def get_digest_from_info(info, package_name=None):
+        return ComponentBuildInfo.of(info, package_name).digest
+
+    @staticmethod
+    def get_pull_spec_from_info(info, package_name=None):
+        return ComponentBuildInfo.of(info, package_name).pull_spec
 
     @staticmethod
     def get_pull_spec_from_brew(brew_client, nvr):
@@ -143,35 +126,50 @@ class BundleAutomation:
         n = ".".join(list(str(n) + "0")) + "-0"
         return n
 
-    ''' 
+    '''
     Parses build information stored in ENV VARs from builds executed in earlier stage in pipeline:
-    
+
     'CONTAINER_BUILDS_OPERATOR_BUILD_INFO_JSON'
     'CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON'
     'CONTAINER_BUILDS_DRAIN_CLEANER_BUILD_INFO_JSON'
     'CONTAINER_BUILDS_KAFKA_34_BUILD_INFO_JSON'
     'CONTAINER_BUILDS_KAFKA_35_BUILD_INFO_JSON'
-  
-    and returns a list of dictionaries in the following format:
-  
+
+    and returns a registry of validated build infos indexed by package name:
+
     {
-      'amqstreams-operator-container': '{BUILD_INFO_JSON}'
-      'amqstreams-bridge-container': '{BUILD_INFO_JSON}'
-      'amqstreams-drain-cleaner-container': '{BUILD_INFO_JSON}'
-      'amqstreams-kafka-34-container': '{BUILD_INFO_JSON}'
-      'amqstreams-kafka-35-container': '{BUILD_INFO_JSON}'
+      'amqstreams-operator-container': ComponentBuildInfo(...)
+      'amqstreams-bridge-container': ComponentBuildInfo(...)
+      'amqstreams-drain-cleaner-container': ComponentBuildInfo(...)
+      'amqstreams-kafka-34-container': ComponentBuildInfo(...)
+      'amqstreams-kafka-35-container': ComponentBuildInfo(...)
     }
     '''
     @staticmethod
     def collect_component_build_info():
         print(" ===== COLLECTING COMPONENT BUILD INFO ===== ")
-        components = {}
+        return ComponentBuildInfoRegistry.from_environ()
 
-        for k, v in os.environ.items():
-            if k.startswith("CONTAINER_BUILDS") and k.endswith("BUILD_INFO_JSON"):
-                info = json.loads(v)
-                components[info["package_name"]] = v
+    """
+    Fetches build info of components missing from the ENV VARs from Brew, using
+    the latest build of each package. All lookups run concurrently, a failed
+    lookup or a package without builds stops the run.
+    """
+    @staticmethod
+    def collect_component_build_info_from_brew(resolver, package_names, version):
+        if not package_names:
+            return {}
+        print(" ===== COLLECTING COMPONENT BUILD INFO FROM BREW ===== ")
+        nvrs = resolver.get_latest_nvrs(package_names, version)
+        builds = resolver.get_builds([nvr for nvr in nvrs.values() if nvr])
 
+        components = {}
+        for package_name, nvr in nvrs.items():
+            if builds.get(nvr):
+                print("NVR:", nvr)
+                components[package_name] = ComponentBuildInfo.from_dict(builds[nvr], "Brew build " + nvr)
+            else:
+                raise ValueError(f"No build found in brew for package {package_name} and version {version}")
         return components
 
     @staticmethod
@@ -215,23 +213,36 @@ class BundleAutomation:
         else:
             return None
 
+    @staticmethod
+    def get_image_annotations(data):
+        yaml_data = ClusterServiceVersion.of(data).document
+        try:
+          return yaml_data["spec"]["install"]["spec"]["deployments"][BundleAutomation.STRIMZI_DEPLOYMENT]["spec"]["template"]["metadata"]["annotations"]
+        except KeyError as e:
+          print(f"ERROR: pull spec replacement failed due to missing key {e} in Cluster Service Version file")
+          return {}
+
+    @staticmethod
+    def get_annotation_package_names(data):
+        package_names = []
+        for key, pull_spec_from_annotation in BundleAutomation.get_image_annotations(data).items():
+            package_name = BundleAutomation.generate_package_name_from_annotation({key : pull_spec_from_annotation})
+            if package_name and package_name not in package_names:
+                package_names.append(package_name)
+        return package_names
+
     @staticmethod
     def create_tag_dict_from_new_csv_format(data, components):
         tag_dict = {}
 
         print("--- Replacing pull specs with latest NVRs ---")
-        yaml_data = yaml.safe_load(data)
-        try:
-          annotations = yaml_data["spec"]["install"]["spec"]["deployments"][BundleAutomation.STRIMZI_DEPLOYMENT]["spec"]["template"]["metadata"]["annotations"]
-        except KeyError as e:
-          print(f"ERROR: pull spec replacement failed due to missing key {e} in Cluster Service Version file")
-          annotations = {}
+        annotations = BundleAutomation.get_image_annotations(data)
 
         for key, pull_spec_from_annotation in annotations.items():
             package_name =  BundleAutomation.generate_package_name_from_annotation({key : pull_spec_from_annotation})
             if package_name:
               # CPaaS provides pull_specs in format: "<PLACEHOLDER>/rh-osbs/amq-streams-bridge-rhel8:2.5.0-5"
-              pull_spec_from_build_info = BundleAutomation.get_pull_spec_from_info(components.get(package_name))
+              pull_spec_from_build_info = BundleAutomation.get_pull_spec_from_info(components.get(package_name), package_name)
 
               # Because tags are not unique we use image name + tag
               # to know which pull specs to update in the cluster service version file
@@ -250,13 +261,13 @@ class BundleAutomation:
         sha_dict = {}
         print("--- Replacing SHAs with latest NVRs ---")
 
-        data_yaml = yaml.safe_load(data)
+        data_yaml = ClusterServiceVersion.of(data).document
         for entry in data_yaml["spec"]["relatedImages"]:
             name = entry['name']
             image = entry['image']
 
             package_name = BundleAutomation.generate_package_name(name)
-            pull_spec = BundleAutomation.get_digest_from_info(components.get(package_name))
+            pull_spec = BundleAutomation.get_digest_from_info(components.get(package_name), package_name)
 
             old_sha = BundleAutomation.format_sha(image)
             new_sha = BundleAutomation.format_sha(pull_spec)
@@ -276,17 +287,8 @@ class BundleAutomation:
     '''
     @staticmethod
     def generate_bundle_version_strings(brew_client, data, product_version):
-        # Sort to get latest build for version
-        builds = brew_client.listBuilds(prefix=constants.METADATA_PACKAGE_NAME, queryOpts={'order': 'creation_ts'})
-        # Reverse so latest build appear first
-        builds.reverse()
-
-        respin_number = 0;
-        for build in builds:
-        # Since the builds are in order take the latest build which matches the major and minor version
-            if build['version'] == product_version:
-                if BundleAutomation.is_build_released(brew_client, build):
-                    respin_number+=1;
+        # Count released bundle builds of this version
+        respin_number = BuildIndex.of(brew_client).count_released(constants.METADATA_PACKAGE_NAME, product_version)
 
         old_bundle_version = BundleAutomation.get_replace_version(data)
         new_bundle_version = product_version + "-" + str(respin_number)
@@ -309,15 +311,17 @@ class BundleAutomation:
     def update_cluster_service_version_data(data, bundle_versions, tag_dict):
         old_bundle_version = bundle_versions[0]
         new_bundle_version = bundle_versions[1]
+        start_interval = BundleAutomation.get_start_interval(new_bundle_version)
 
+        rewriter = CsvRewriter()
+        rewriter.sub("skipRange", r"olm.skipRange: '>=\d.\d.\d-\d <\d.\d.\d-\d'",
+                     "olm.skipRange: '>=" + start_interval + " <" + new_bundle_version + "'")
+        rewriter.sub("replaces", r"replaces: amqstreams\.v.*", "replaces: amqstreams.v" + old_bundle_version)
         for old, new in tag_dict.items():
-            data = data.replace(old, new)
-
-        data = data.replace(old_bundle_version, new_bundle_version)
+            rewriter.replace("pull spec", old, new)
+        rewriter.replace("version", old_bundle_version, new_bundle_version)
 
-        start_interval = BundleAutomation.get_start_interval(new_bundle_version)
-        data = re.sub(r"olm.skipRange: '>=\d.\d.\d-\d <\d.\d.\d-\d'",
-                          "olm.skipRange: '>=" + start_interval + " <" + new_bundle_version + "'", data)
-        data = re.sub(r'replaces: amqstreams.v.*..*..*', 'replaces: amqstreams.v' + old_bundle_version, data)
+        data = rewriter.apply(data)
+        rewriter.print_report()
 
         return data
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: bundle_update.py
+########################################################"""
+import os
+
+from . import pipeline
+from .build_index import BuildIndex
+from .bundle_automation import BundleAutomation
+from .cluster_service_version import ClusterServiceVersion
+from .component_build_info import ComponentBuildInfoRegistry
+from .crd_compaction import CrdCompactor
+from .file import File
+from .pull_specs import PullSpecResolver
+
+
+def create_pipeline(environ, create_session):
+    """Build the stage graph of a bundle update.
+
+    environ holds the automation settings (DIST_GIT_CSV_FILE_PATH, BREW_CACHE_PATH, ...),
+    create_session(opts=None) returns a new Brew session, e.g. a koji.ClientSession.
+    """
+    # Brew builds are listed once per run and optionally cached on disk between re-runs
+    def connect():
+        return BuildIndex(create_session(),
+                          environ.get('BREW_CACHE_PATH'),
+                          int(environ.get('BREW_CACHE_TTL', 600)))
+
+    def parse():
+        cluster_service_version_file = File(environ['DIST_GIT_CSV_FILE_PATH'])
+        # Parse the CSV once and share it between all accessors
+        cluster_service_version = ClusterServiceVersion(cluster_service_version_file.data)
+        return cluster_service_version_file, cluster_service_version, BundleAutomation.get_product_version(cluster_service_version)
+
+    def collect_build_info():
+        component_data = BundleAutomation.collect_component_build_info()
+        # Build infos can also be provided as a directory of JSON files
+        if environ.get('COMPONENT_BUILD_INFO_DIR'):
+            component_data.update(ComponentBuildInfoRegistry.from_directory(environ['COMPONENT_BUILD_INFO_DIR']))
+        return component_data
+
+    def query_bundle_versions(build_index, parsed):
+        _, cluster_service_version, product_version = parsed
+        return BundleAutomation.generate_bundle_version_strings(build_index, cluster_service_version, product_version)
+
+    def query_components(parsed, component_data):
+        _, cluster_service_version, product_version = parsed
+        missing_packages = [package_name for package_name in BundleAutomation.get_annotation_package_names(cluster_service_version)
+                            if package_name not in component_data]
+        if not missing_packages:
+            return component_data
+        # The latest Brew build may not be the one CPaaS built, so it is only used when asked for
+        if environ.get('BREW_COMPONENT_FALLBACK', 'false').lower() != 'true':
+            raise ValueError(f"No build info for components {', '.join(missing_packages)}, "
+                             "set BREW_COMPONENT_FALLBACK=true to use their latest Brew builds")
+        # Component lookups run concurrently, each worker thread gets its own session
+        resolver = PullSpecResolver(lambda: create_session({'timeout': int(environ.get('BREW_TIMEOUT', 60))}),
+                                    max_workers=int(environ.get('BREW_WORKERS', 8)))
+        component_data.update(BundleAutomation.collect_component_build_info_from_brew(resolver, missing_packages, product_version))
+        return component_data
+
+    def rewrite(parsed, component_data, bundle_versions):
+        cluster_service_version_file, cluster_service_version, _ = parsed
+        # Get old to new tag mappings
+        tag_dict = BundleAutomation.create_tag_dict_from_new_csv_format(cluster_service_version, component_data)
+        # Update CSV with new pull_specs + bump bundle version
+        cluster_service_version_file.data = BundleAutomation.update_cluster_service_version_data(cluster_service_version_file.data, bundle_versions, tag_dict)
+
+    def write(parsed):
+        parsed[0].write_all([environ['DIST_GIT_CSV_FILE_PATH'], environ['GIT_HUB_CSV_FILE_PATH']])
+
+    def compact_crds():
+        compactor = CrdCompactor(environ.get('CRD_COMPACT_FORMAT', 'yaml'),
+                                 strip_descriptions=environ.get('CRD_STRIP_DESCRIPTIONS', 'false').lower() == 'true')
+        CrdCompactor.print_report(compactor.compact_directory(os.path.dirname(environ['DIST_GIT_CSV_FILE_PATH']),
+                                                              environ['CRD_COMPACT_OUTPUT_DIR']))
+
+    # Loading the build index and build infos overlaps the CSV parse, every Brew query needs the product
+    # version from the CSV, afterwards the bundle respin query and the component lookups run concurrently
+    stages = pipeline.Pipeline()
+    stages.add("brew_index", connect)
+    stages.add("parse", parse)
+    stages.add("build_info", collect_build_info)
+    stages.add("brew_query/bundle_versions", query_bundle_versions, inputs=["brew_index", "parse"])
+    stages.add("brew_query/components", query_components, inputs=["parse", "build_info"])
+    stages.add("csv_rewrite", rewrite, inputs=["parse", "brew_query/components", "brew_query/bundle_versions"])
+    stages.add("write", write, inputs=["parse"], after=["csv_rewrite"])
+    # Optional compaction of the bundle CRDs next to the CSV into a separate directory, once the CSV is written
+    if environ.get('CRD_COMPACT_OUTPUT_DIR'):
+        CrdCompactor.check_output_dir(os.path.dirname(environ['DIST_GIT_CSV_FILE_PATH']), environ['CRD_COMPACT_OUTPUT_DIR'])
+        stages.add("crd_compact", compact_crds, after=["write"])
+    return stages
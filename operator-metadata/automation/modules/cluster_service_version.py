@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: cluster_service_version.py
+########################################################"""
+import yaml
+
+# libyaml based loader is much faster on large CSVs, fall back to the pure Python one
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ClusterServiceVersion:
+    """Cluster Service Version file contents, parsed once and shared by all accessors."""
+
+    parse_count = 0
+
+    def __init__(self, data):
+        self.data = data
+        self.document = yaml.load(data, Loader=Loader)
+        ClusterServiceVersion.parse_count += 1
+
+    @staticmethod
+    def of(data):
+        if isinstance(data, ClusterServiceVersion):
+            return data
+        return ClusterServiceVersion(data)
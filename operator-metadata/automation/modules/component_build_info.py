@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: component_build_info.py
+########################################################"""
+import json
+import os
+from dataclasses import dataclass
+
+MANIFEST_LIST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.list.v2+json"
+PULL_SPEC_WITH_TAG = 1
+
+
+@dataclass(frozen=True)
+class ComponentBuildInfo:
+    """Fields of a container build info payload used by the bundle automation."""
+
+    package_name: str
+    nvr: str
+    version: str
+    release: str
+    pull_specs: tuple
+    digest: str
+
+    # CPaaS provides pull_specs in format: "<PLACEHOLDER>/rh-osbs/amq-streams-bridge-rhel8:2.5.0-5"
+    @property
+    def pull_spec(self):
+        return self.pull_specs[PULL_SPEC_WITH_TAG]
+
+    # Validates a build info payload, either from CPaaS or a build fetched from Brew
+    @staticmethod
+    def from_dict(info, source="build info"):
+        # e.g. None for a package without build info
+        if not isinstance(info, dict):
+            raise ValueError(f"No {source}")
+        try:
+            index = info["extra"]["image"]["index"]
+            build_info = ComponentBuildInfo(
+                package_name=info["package_name"],
+                nvr=info["nvr"],
+                version=info["version"],
+                release=str(info["release"]),
+                pull_specs=tuple(index["pull"]),
+                digest=index["digests"][MANIFEST_LIST_MEDIA_TYPE],
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid {source}: missing key {e}") from None
+        if len(build_info.pull_specs) <= PULL_SPEC_WITH_TAG:
+            raise ValueError(f"Invalid {source}: no tagged pull spec for {build_info.nvr}")
+        if not build_info.digest.startswith("sha256:"):
+            raise ValueError(f"Invalid {source}: unexpected digest {build_info.digest} for {build_info.nvr}")
+        return build_info
+
+    @staticmethod
+    def from_json(payload, source="build info"):
+        try:
+            info = json.loads(payload)
+        except ValueError as e:
+            raise ValueError(f"Invalid {source}: {e}") from None
+        return ComponentBuildInfo.from_dict(info, source)
+
+    @staticmethod
+    def of(info, package_name=None):
+        if isinstance(info, ComponentBuildInfo):
+            return info
+        source = f"build info for {package_name}" if package_name else "build info"
+        if isinstance(info, str):
+            return ComponentBuildInfo.from_json(info, source)
+        return ComponentBuildInfo.from_dict(info, source)
+
+
+class ComponentBuildInfoRegistry:
+    """Component build infos indexed by package name, each payload parsed once."""
+
+    SUFFIX = "BUILD_INFO_JSON"
+
+    def __init__(self, components=None):
+        self.components = {}
+        self.update(components or {})
+
+    def add(self, build_info, package_name=None):
+        build_info = ComponentBuildInfo.of(build_info, package_name)
+        self.components[build_info.package_name] = build_info
+        return build_info
+
+    def update(self, components):
+        for package_name, build_info in components.items():
+            self.add(build_info, package_name)
+
+    def get(self, package_name, default=None):
+        return self.components.get(package_name, default)
+
+    def __contains__(self, package_name):
+        return package_name in self.components
+
+    def __len__(self):
+        return len(self.components)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def items(self):
+        return self.components.items()
+
+    def values(self):
+        return self.components.values()
+
+    '''
+    Loads build information stored in ENV VARs from builds executed in earlier stage in pipeline
+    e.g. 'CONTAINER_BUILDS_OPERATOR_BUILD_INFO_JSON'
+    '''
+    @staticmethod
+    def from_environ(environ=None):
+        registry = ComponentBuildInfoRegistry()
+        for k, v in sorted((os.environ if environ is None else environ).items()):
+            if k.startswith("CONTAINER_BUILDS") and k.endswith(ComponentBuildInfoRegistry.SUFFIX):
+                registry.add(ComponentBuildInfo.from_json(v, k))
+        return registry
+
+    # Loads every *BUILD_INFO_JSON and *.json file of a directory
+    @staticmethod
+    def from_directory(path):
+        registry = ComponentBuildInfoRegistry()
+        for name in sorted(os.listdir(path)):
+            if name.endswith(ComponentBuildInfoRegistry.SUFFIX) or name.endswith(".json"):
+                with open(os.path.join(path, name), 'r') as file:
+                    registry.add(ComponentBuildInfo.from_json(file.read(), os.path.join(path, name)))
+        return registry
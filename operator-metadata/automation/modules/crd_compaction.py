@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: crd_compaction.py
+########################################################"""
+import glob
+import gzip
+import json
+import os
+from dataclasses import dataclass
+
+import yaml
+
+from . import instrumentation
+from .file import File
+
+# libyaml based loader and dumper are much faster on large CRDs, fall back to the pure Python ones
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+CRD_SUFFIX = ".crd.yaml"
+FORMATS = ("yaml", "min-yaml", "json")
+# Smaller identical subtrees aren't worth an anchor
+MIN_SHARED_SIZE = 256
+# Minified YAML is written on a single line
+MAX_WIDTH = 2 ** 31 - 1
+
+
+# Drops the description of every schema node. Only string values are dropped, so properties named
+# description, whose values are schemas, are kept.
+def strip_descriptions(node):
+    if isinstance(node, dict):
+        return {key: strip_descriptions(value) for key, value in node.items()
+                if not (key == "description" and isinstance(node[key], str))}
+    if isinstance(node, list):
+        return [strip_descriptions(value) for value in node]
+    return node
+
+
+def strip_schema_descriptions(document):
+    document = dict(document, spec=dict(document["spec"]))
+    document["spec"]["versions"] = [
+        dict(version, schema=strip_descriptions(version["schema"])) if "schema" in version else version
+        for version in document["spec"]["versions"]
+    ]
+    return document
+
+
+# Makes identical subtrees the same object, e.g. the schemas of all served versions, so they are
+# dumped once with an anchor and referenced by aliases
+def share_subtrees(document, min_size=MIN_SHARED_SIZE):
+    shared = {}
+
+    def share(node):
+        if isinstance(node, dict):
+            node = {key: share(value) for key, value in node.items()}
+        elif isinstance(node, list):
+            node = [share(value) for value in node]
+        else:
+            return node
+        key = json.dumps(node, sort_keys=True, separators=(",", ":"))
+        if len(key) < min_size:
+            return node
+        return shared.setdefault(key, node)
+
+    return share(document)
+
+
+def dump(document, output_format="yaml", dedupe=True):
+    if output_format == "json":
+        # JSON has no aliases, subtrees can't be shared
+        return json.dumps(document, separators=(",", ":")) + "\n"
+    if dedupe:
+        document = share_subtrees(document)
+    if output_format == "min-yaml":
+        return yaml.dump(document, Dumper=Dumper, sort_keys=False, default_flow_style=True, width=MAX_WIDTH)
+    return yaml.dump(document, Dumper=Dumper, sort_keys=False)
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    """Sizes of a CRD before and after compaction, in bytes."""
+
+    name: str
+    path: str
+    original_size: int
+    compacted_size: int
+    original_gzip_size: int
+    compacted_gzip_size: int
+
+    @property
+    def saved(self):
+        return 1 - self.compacted_size / self.original_size if self.original_size else 0.0
+
+
+class CrdCompactor:
+    """Writes compacted copies of the bundle CRDs.
+
+    Identical subtrees are written once as YAML anchors, descriptions can be
+    dropped and the output can be minified YAML or JSON. Every compacted CRD
+    is loaded again and compared to the original before it is written.
+    """
+
+    def __init__(self, output_format="yaml", dedupe=True, strip_descriptions=False):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown CRD format {output_format}, expected one of {', '.join(FORMATS)}")
+        self.output_format = output_format
+        self.dedupe = dedupe
+        self.strip_descriptions = strip_descriptions
+
+    def output_name(self, path):
+        name = os.path.basename(path)
+        if self.output_format == "json":
+            return name[:-len(CRD_SUFFIX)] + ".crd.json"
+        return name
+
+    def compact(self, contents):
+        document = yaml.load(contents, Loader=Loader)
+        if self.strip_descriptions:
+            document = strip_schema_descriptions(document)
+        compacted = dump(document, self.output_format, self.dedupe)
+        if yaml.load(compacted, Loader=Loader) != document:
+            raise ValueError(f"Compacted CRD {document['metadata']['name']} doesn't match the original")
+        return document["metadata"]["name"], compacted.encode("utf-8")
+
+    # Compacts every CRD of manifests_dir into output_dir, which must be a separate directory:
+    # compacted CRDs are build output, manifests_dir keeps the CRDs crd_sync compares with the install files
+    def compact_directory(self, manifests_dir, output_dir):
+        CrdCompactor.check_output_dir(manifests_dir, output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        results = []
+        for path in sorted(glob.glob(os.path.join(manifests_dir, "*" + CRD_SUFFIX))):
+            contents = File.read_bytes(path)
+            name, compacted = self.compact(contents)
+            output_path = os.path.join(output_dir, self.output_name(path))
+            if not File.has_contents(output_path, compacted):
+                File.write_atomic(output_path, compacted)
+                instrumentation.count("bytes_written", len(compacted))
+            instrumentation.count("crds_compacted")
+            results.append(CompactionResult(name, output_path, len(contents), len(compacted),
+                                            len(gzip.compress(contents)), len(gzip.compress(compacted))))
+        return results
+
+    @staticmethod
+    def check_output_dir(manifests_dir, output_dir):
+        if os.path.realpath(output_dir) == os.path.realpath(manifests_dir):
+            raise ValueError(f"Output directory {output_dir} is the manifests directory, "
+                             "compacted CRDs have to be written to a separate directory")
+
+    @staticmethod
+    def print_report(results):
+        for result in results:
+            print(f"{result.name}: {result.original_size} -> {result.compacted_size} bytes "
+                  f"({result.saved:.0%} smaller), gzipped {result.original_gzip_size} -> {result.compacted_gzip_size}")
+        original = sum(result.original_size for result in results)
+        compacted = sum(result.compacted_size for result in results)
+        print(f"Total: {original} -> {compacted} bytes")
+
+    @staticmethod
+    def write_report(results, path):
+        report = [dict(vars(result), saved=round(result.saved, 4)) for result in results]
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
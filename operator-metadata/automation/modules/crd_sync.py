@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: crd_sync.py
+########################################################"""
+import glob
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import yaml
+
+from . import instrumentation
+from .file import File
+
+# libyaml based loader is much faster on large CRDs, fall back to the pure Python one
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+SOURCE_PATTERN = "04*-Crd-*.yaml"
+TARGET_SUFFIX = ".crd.yaml"
+
+IN_SYNC = "in sync"
+FORMATTING_ONLY = "formatting only"
+OUT_OF_SYNC = "out of sync"
+MISSING = "missing"
+UPDATED = "updated"
+CREATED = "created"
+NO_SOURCE = "no source"
+
+
+# Returns metadata.name of a CRD, parsing events only up to it instead of loading the whole document
+def get_crd_name(contents):
+    # One entry per open collection, [key, expecting key] for mappings and None for sequences
+    stack = []
+    for event in yaml.parse(contents, Loader=Loader):
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            if stack and stack[-1] is not None:
+                stack[-1][1] = True
+            stack.append([None, True] if isinstance(event, yaml.MappingStartEvent) else None)
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            stack.pop()
+        elif isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)) and stack and stack[-1] is not None:
+            entry = stack[-1]
+            if entry[1]:
+                entry[0], entry[1] = getattr(event, "value", None), False
+                continue
+            entry[1] = True
+            if len(stack) == 2 and stack[0] is not None and [stack[0][0], entry[0]] == ["metadata", "name"]:
+                return event.value
+    return None
+
+
+def load_crd(contents):
+    return yaml.load(contents, Loader=Loader)
+
+
+@dataclass(frozen=True)
+class CrdFile:
+    """Raw contents of a CRD file with their digest and CRD name."""
+
+    path: str
+    contents: bytes
+    sha256: str
+    name: str
+
+    @classmethod
+    def read(cls, path):
+        contents = File.read_bytes(path)
+        return cls(path, contents, hashlib.sha256(contents).hexdigest(), get_crd_name(contents))
+
+
+@dataclass(frozen=True)
+class CrdSyncResult:
+    """Outcome of syncing one CRD."""
+
+    name: str
+    source: str
+    target: str
+    status: str
+
+
+class CrdSync:
+    """Keeps the bundle CRDs in sync with the cluster operator install files.
+
+    Both sides are read and hashed in parallel, CRDs are matched by name and
+    only files whose digests differ are parsed. Targets that only differ in
+    formatting are left alone, the others are replaced by the source file.
+    """
+
+    def __init__(self, source_dir, target_dir, max_workers=8):
+        self.source_dir = source_dir
+        self.target_dir = target_dir
+        self.max_workers = max_workers
+
+    # Reads paths into CRD files by name, files without a name or sharing one can't be matched and are rejected
+    def scan(self, paths):
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            files = list(executor.map(CrdFile.read, paths))
+        instrumentation.count("crds_hashed", len(files))
+
+        crds = {}
+        errors = []
+        for crd in files:
+            if crd.name is None:
+                errors.append(f"{crd.path} has no metadata.name")
+            elif crd.name in crds:
+                errors.append(f"{crd.path} and {crds[crd.name].path} are both named {crd.name}")
+            else:
+                crds[crd.name] = crd
+        if errors:
+            raise ValueError("Can't match CRD files by name: " + "; ".join(errors))
+        return crds
+
+    def target_path(self, name):
+        return os.path.join(self.target_dir, name + TARGET_SUFFIX)
+
+    def compare(self, source, target):
+        if target is None:
+            return MISSING
+        if source.sha256 == target.sha256:
+            return IN_SYNC
+        instrumentation.count("crds_parsed", 2)
+        if load_crd(source.contents) == load_crd(target.contents):
+            return FORMATTING_ONLY
+        return OUT_OF_SYNC
+
+    # Compares every CRD and, unless check is set, rewrites the targets that differ semantically
+    def sync(self, check=False):
+        with instrumentation.span("hash"):
+            sources = self.scan(sorted(glob.glob(os.path.join(self.source_dir, SOURCE_PATTERN))))
+            targets = self.scan(sorted(glob.glob(os.path.join(self.target_dir, "*" + TARGET_SUFFIX))))
+
+        with instrumentation.span("compare"):
+            names = sorted(sources)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(names)))) as executor:
+                statuses = list(executor.map(lambda name: self.compare(sources[name], targets.get(name)), names))
+
+        results = []
+        with instrumentation.span("write"):
+            for name, status in zip(names, statuses):
+                source = sources[name]
+                target_path = targets[name].path if name in targets else self.target_path(name)
+                if not check and status in (OUT_OF_SYNC, MISSING):
+                    File.write_atomic(target_path, source.contents)
+                    instrumentation.count("crds_written")
+                    status = UPDATED if status == OUT_OF_SYNC else CREATED
+                results.append(CrdSyncResult(name, source.path, target_path, status))
+
+        for name in sorted(set(targets) - set(sources)):
+            results.append(CrdSyncResult(name, None, targets[name].path, NO_SOURCE))
+        return results
+
+    @staticmethod
+    def is_in_sync(results):
+        return all(result.status not in (OUT_OF_SYNC, MISSING) for result in results)
+
+    @staticmethod
+    def print_report(results):
+        for result in results:
+            if result.status in (IN_SYNC, FORMATTING_ONLY):
+                print(f"{result.name}: {result.status}")
+            else:
+                print(f"{result.name}: {result.status} ({result.source or '-'} -> {result.target})")
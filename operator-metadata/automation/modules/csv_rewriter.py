@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: csv_rewriter.py
+########################################################"""
+import re
+from dataclasses import dataclass
+
+
+# Regex matching any of the words, built as a trie so matching doesn't slow down with
+# the number of words. Longer words are preferred over their prefixes
+def trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        end = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if end else "")
+
+    return emit(trie)
+
+
+@dataclass(frozen=True)
+class Change:
+    line: int
+    rule: str
+    old: str
+    new: str
+
+
+class CsvRewriter:
+    """Applies all Cluster Service Version substitutions in a single pass.
+
+    Rules are combined into one regex, so the file is copied once and a
+    replacement is never rewritten again by a later rule. Pattern rules take
+    precedence over literals and longer literals over their prefixes. Literals
+    only match whole versions, so '2.5.0-1' doesn't match inside '2.5.0-10'.
+    Every change is recorded with its line number.
+    """
+
+    def __init__(self):
+        self.patterns = []
+        self.literals = []
+        self.changes = []
+        self.regex = None
+
+    def replace(self, rule, old, new):
+        self.literals.append((rule, old, new))
+        self.regex = None
+        return self
+
+    def sub(self, rule, pattern, new):
+        self.patterns.append((rule, pattern, new))
+        self.regex = None
+        return self
+
+    def compile(self):
+        self.rules = list(self.patterns)
+        alternatives = [f"(?P<r{i}>{old})" for i, (rule, old, new) in enumerate(self.patterns)]
+        # Literals are looked up by the matched text, the first rule of a literal wins
+        self.literal_rules = {}
+        for rule, old, new in self.literals:
+            self.literal_rules.setdefault(old, (rule, old, new))
+        if self.literal_rules:
+            alternatives.append(f"(?P<literal>(?<![0-9]){trie_pattern(self.literal_rules)}(?![0-9]))")
+        self.regex = re.compile("|".join(alternatives))
+
+    def apply(self, data):
+        if self.regex is None:
+            self.compile()
+        self.changes = []
+        if not self.rules and not self.literal_rules:
+            return data
+
+        position = {"offset": 0, "line": 1}
+
+        def substitute(match):
+            position["line"] += data.count("\n", position["offset"], match.start())
+            position["offset"] = match.start()
+            if match.lastgroup == "literal":
+                rule, old, new = self.literal_rules[match.group()]
+            else:
+                rule, old, new = self.rules[int(match.lastgroup[1:])]
+            self.changes.append(Change(position["line"], rule, match.group(), new))
+            return new
+
+        return self.regex.sub(substitute, data)
+
+    def print_report(self):
+        print(f"--- {len(self.changes)} locations changed ---")
+        for change in self.changes:
+            print(f"{change.line}: [{change.rule}] {change.old} -> {change.new}")
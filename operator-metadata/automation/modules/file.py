@@ -1,8 +1,31 @@
+import mmap
+import os
+import tempfile
+
+from . import instrumentation
+
+
 class File:
+  """File contents loaded lazily on first access.
+
+  Large manifests are read through mmap, writes go to a temporary file that is
+  renamed over the destination, so a killed pipeline never leaves a partially
+  written file behind.
+  """
+
   def __init__(self, path):
-    with open(path, 'r') as file:
-      self.data = file.read().rstrip()
     self.path = path
+    self._data = None
+
+  @property
+  def data(self):
+    if self._data is None:
+      self._data = File.read_bytes(self.path).decode('utf-8').rstrip()
+    return self._data
+
+  @data.setter
+  def data(self, data):
+    self._data = data
 
   def get_data(self):
     return self.data
@@ -10,10 +33,53 @@ class File:
   def get_path(self):
     return self.path
 
-  def write(self):
-    with open(self.path, 'w') as sources:
-      sources.write(self.data)
+  @staticmethod
+  def read_bytes(path):
+    with open(path, 'rb') as file:
+      if os.fstat(file.fileno()).st_size == 0:
+        return b""
+      with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+        instrumentation.count("bytes_read", len(contents))
+        return contents[:]
+
+  @staticmethod
+  def has_contents(path, contents):
+    try:
+      if os.path.getsize(path) != len(contents):
+        return False
+      return File.read_bytes(path) == contents
+    except FileNotFoundError:
+      return False
+
+  @staticmethod
+  def write_atomic(path, contents):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix="." + os.path.basename(path) + ".")
+    try:
+      with os.fdopen(fd, 'wb') as sources:
+        sources.write(contents)
+      mode = os.stat(path).st_mode if os.path.exists(path) else 0o644
+      os.chmod(tmp_path, mode)
+      os.replace(tmp_path, path)
+    except BaseException:
+      os.unlink(tmp_path)
+      raise
+
+  # Writes the data to the file's own path or the given one
+  def write(self, path=None):
+    return self.write_all([path or self.path])
 
-  def write(self, path):
-    with open(path, 'w') as sources:
-      sources.write(self.data)
\ No newline at end of file
+  # Encodes the data once and writes it to every destination whose contents differ,
+  # returns the paths that were written
+  def write_all(self, paths):
+    contents = self.data.encode('utf-8')
+    written = []
+    for path in dict.fromkeys(paths):
+      if File.has_contents(path, contents):
+        print("Skipping", path, "- already up to date")
+        continue
+      File.write_atomic(path, contents)
+      written.append(path)
+      instrumentation.count("files_written")
+      instrumentation.count("bytes_written", len(contents))
+    return written
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: pipeline.py
+########################################################"""
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import instrumentation
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class Stage:
+    """Step of a pipeline, function is called with the results of its input stages."""
+
+    def __init__(self, name, function, inputs=(), after=()):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.after = list(after)
+
+    @property
+    def dependencies(self):
+        return self.inputs + [name for name in self.after if name not in self.inputs]
+
+
+class Pipeline:
+    """Runs stages on threads as soon as the stages they depend on are done.
+
+    Stages can only depend on stages added before them, so the graph has no
+    cycles. When a stage fails its dependents are skipped, independent stages
+    still run, and the first failure is raised once nothing is left to run.
+    Stages run in a copy of the caller's context variables.
+    The start time, duration and status of every stage is kept in `trace`.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.results = {}
+        self.trace = []
+
+    # Adds a stage called with the results of `inputs`, running after `inputs` and `after`
+    def add(self, name, function, inputs=(), after=()):
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage {name}")
+        stage = Stage(name, function, inputs, after)
+        unknown = [dependency for dependency in stage.dependencies if dependency not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages {unknown}")
+        self.stages[name] = stage
+        return self
+
+    def _run_stage(self, stage, parent):
+        start = time.perf_counter()
+        with instrumentation.span(f"{parent}/{stage.name}" if parent else stage.name):
+            result = stage.function(*[self.results[name] for name in stage.inputs])
+        return result, start, time.perf_counter() - start
+
+    def run(self):
+        parent = instrumentation.INSTRUMENTATION.current_path()
+        context = contextvars.copy_context()
+        origin = time.perf_counter()
+        pending = dict(self.stages)
+        failed = set()
+        errors = []
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(dependency in failed for dependency in stage.dependencies):
+                        del pending[name]
+                        failed.add(name)
+                        self.trace.append({"name": name, "status": "skipped"})
+                    elif all(dependency in self.results for dependency in stage.dependencies):
+                        del pending[name]
+                        running[executor.submit(context.copy().run, self._run_stage, stage, parent)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result, start, seconds = future.result()
+                    except Exception as e:
+                        failed.add(stage.name)
+                        errors.append(e)
+                        self.trace.append({"name": stage.name, "status": "failed", "error": str(e)})
+                        print(f"Stage {stage.name} failed: {e}")
+                        continue
+                    self.results[stage.name] = result
+                    self.trace.append({"name": stage.name, "status": "done", "start": round(start - origin, 6),
+                                       "seconds": round(seconds, 6)})
+
+        if errors:
+            raise errors[0]
+        return self.results
+
+    def print_trace(self):
+        for entry in self.trace:
+            if entry["status"] == "done":
+                print(f"{entry['name']}: started at {entry['start']:.3f}s, took {entry['seconds']:.3f}s")
+            else:
+                print(f"{entry['name']}: {entry['status']}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""########################################################
+ FILE: pull_specs.py
+########################################################"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import brew_queries
+from . import instrumentation
+
+
+class PullSpecResolver:
+    """Runs Brew lookups of many images concurrently.
+
+    koji sessions aren't thread safe, so each worker thread creates its own
+    session with session_factory, which should set the per-call timeout e.g.
+    koji.ClientSession(url, opts={'timeout': 60}). Failed calls are retried
+    with exponential backoff, the last error is raised.
+    """
+
+    def __init__(self, session_factory, max_workers=8, retries=3, backoff=1.0):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.local = threading.local()
+
+    def get_session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = self.session_factory()
+        return self.local.session
+
+    # Calls function(session, item), retrying on errors. Raises the last error once all attempts failed
+    def call(self, function, item):
+        for attempt in range(self.retries + 1):
+            try:
+                instrumentation.count("brew_rpcs")
+                return function(self.get_session(), item)
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"An unexpected error occurred: {e}. Brew lookup failed for", item)
+                    raise
+                print(f"Brew lookup failed for {item} ({e}), retrying")
+                time.sleep(self.backoff * 2 ** attempt)
+
+    # Returns {item: result}, with at most max_workers lookups in flight
+    def map(self, function, items):
+        items = list(dict.fromkeys(items))
+        if not items:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            results = executor.map(lambda item: self.call(function, item), items)
+            return dict(zip(items, results))
+
+    def get_builds(self, nvrs):
+        return self.map(lambda session, nvr: session.getBuild(nvr), nvrs)
+
+    def get_latest_nvrs(self, package_names, version):
+        return self.map(lambda session, package_name:
+                        brew_queries.latest_nvr(brew_queries.list_builds(session, package_name, version)),
+                        package_names)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+from modules import instrumentation
+from modules.crd_sync import CrdSync
+
+import argparse
+import os
+import sys
+
+REPOSITORY_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+def parse_args():
+  parser = argparse.ArgumentParser(description="Sync the bundle CRDs with the cluster operator install CRDs")
+  parser.add_argument("--source-dir", default=os.path.join(REPOSITORY_ROOT, "install", "cluster-operator"),
+                      help="Directory with the 04*-Crd-*.yaml install files (default: install/cluster-operator)")
+  parser.add_argument("--target-dir", default=os.path.join(REPOSITORY_ROOT, "operator-metadata", "manifests"),
+                      help="Directory with the *.crd.yaml bundle manifests (default: operator-metadata/manifests)")
+  parser.add_argument("--check", action="store_true", help="Only report CRDs that differ, exit with 1 if any do")
+  parser.add_argument("--workers", type=int, default=8, help="Number of threads reading and comparing CRDs (default: 8)")
+  return parser.parse_args()
+
+def main():
+  args = parse_args()
+  # Profilers and the metrics summary are enabled through AUTOMATION_PROFILE and AUTOMATION_METRICS_PATH
+  instrumentation.INSTRUMENTATION.start()
+  try:
+    results = CrdSync(args.source_dir, args.target_dir, args.workers).sync(check=args.check)
+  finally:
+    instrumentation.INSTRUMENTATION.finish()
+
+  CrdSync.print_report(results)
+  if args.check and not CrdSync.is_in_sync(results):
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,109 @@
+import fnmatch
+import time
+
+from automation.modules import constants
+
+
+class FakeMulticall:
+    """Queues calls and runs them in one round-trip when the with block exits, like koji's MultiCallSession."""
+
+    class VirtualCall:
+        def __init__(self, method, args, kwargs):
+            self.method = method
+            self.args = args
+            self.kwargs = kwargs
+            self.result = None
+
+    def __init__(self, session):
+        self.session = session
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.session._round_trip("multiCall")
+            for call in self.calls:
+                call.result = getattr(self.session, "_" + call.method)(*call.args, **call.kwargs)
+        return False
+
+    def __getattr__(self, method):
+        def queue(*args, **kwargs):
+            call = FakeMulticall.VirtualCall(method, args, kwargs)
+            self.calls.append(call)
+            return call
+        return queue
+
+
+class FakeKojiSession:
+    """In-process stand-in for koji.ClientSession serving a fixed list of builds.
+
+    Every RPC (a multicall counts once) is recorded in `rpcs` and delayed by `latency` seconds.
+    """
+
+    def __init__(self, builds=None, tags=None, latency=0):
+        self.builds = builds or []
+        self.tags = tags or {}
+        self.latency = latency
+        self.rpcs = []
+
+    @staticmethod
+    def create_build(build_id, package_name, version, release, state=constants.COMPLETED, creation_ts=None):
+        return {
+            'build_id': build_id,
+            'name': package_name,
+            'package_name': package_name,
+            'version': version,
+            'release': str(release),
+            'nvr': f"{package_name}-{version}-{release}",
+            'state': state,
+            'creation_ts': build_id if creation_ts is None else creation_ts,
+        }
+
+    def add_build(self, package_name, version, release, released=False, state=constants.COMPLETED):
+        build = FakeKojiSession.create_build(len(self.builds) + 1, package_name, version, release, state)
+        self.builds.append(build)
+        if released:
+            self.tags[build['build_id']] = [{'name': constants.RELEASE_TAG}]
+        return build
+
+    def _round_trip(self, method):
+        self.rpcs.append(method)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def multicall(self, strict=False):
+        return FakeMulticall(self)
+
+    def listBuilds(self, **kwargs):
+        self._round_trip("listBuilds")
+        return self._listBuilds(**kwargs)
+
+    def _listBuilds(self, prefix=None, pattern=None, state=None, queryOpts=None):
+        builds = [build for build in self.builds
+                  if (prefix is None or build['nvr'].startswith(prefix))
+                  and (pattern is None or fnmatch.fnmatchcase(build['nvr'], pattern))
+                  and (state is None or build['state'] == state)]
+        order = (queryOpts or {}).get('order')
+        if order:
+            builds.sort(key=lambda build: build[order.lstrip("-")], reverse=order.startswith("-"))
+        return [dict(build) for build in builds]
+
+    def listTags(self, build):
+        self._round_trip("listTags")
+        return self._listTags(build)
+
+    def _listTags(self, build):
+        build_id = build['build_id'] if isinstance(build, dict) else build
+        return list(self.tags.get(build_id, []))
+
+    def getBuild(self, nvr):
+        self._round_trip("getBuild")
+        return self._getBuild(nvr)
+
+    def _getBuild(self, nvr):
+        for build in self.builds:
+            if build['nvr'] == nvr:
+                return dict(build)
+        return None
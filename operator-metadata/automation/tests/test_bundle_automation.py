@@ -1,9 +1,22 @@
+import json
 import os
+import tempfile
+import time
 import unittest
+from unittest.mock import Mock
 
+from automation.modules import bundle_update
 from automation.modules import constants
+from automation.modules import instrumentation
+from automation.modules import pipeline
 from automation.modules.file import File
+from automation.modules.build_index import BuildIndex
 from automation.modules.bundle_automation import BundleAutomation
+from automation.modules.cluster_service_version import ClusterServiceVersion
+from automation.modules.component_build_info import ComponentBuildInfo, ComponentBuildInfoRegistry
+from automation.modules.csv_rewriter import CsvRewriter
+from automation.modules.pull_specs import PullSpecResolver
+from automation.tests.fake_koji import FakeKojiSession
 
 
 class TestBundleAutomation(unittest.TestCase):
@@ -41,6 +54,32 @@ class TestBundleAutomation(unittest.TestCase):
         build_info = BundleAutomation.collect_component_build_info()
         self.assertEqual(len(build_info), 6)
 
+    def test_component_build_info_registry(self):
+        registry = ComponentBuildInfoRegistry.from_directory(self.RESOURCES_PATH)
+        self.assertEqual(len(registry), 6)
+        self.assertEqual(sorted(registry), sorted(BundleAutomation.collect_component_build_info()))
+
+        bridge = registry.get("amqstreams-bridge-container")
+        self.assertEqual(bridge.nvr, "amqstreams-bridge-container-2.5.0-5")
+        self.assertEqual(BundleAutomation.get_pull_spec_from_info(bridge), "<PLACEHOLDER>/rh-osbs/amq-streams-bridge-rhel8:2.5.0-5")
+        self.assertEqual(BundleAutomation.get_digest_from_info(bridge),
+                         "sha256:c50a8977fcaaa855305ccaf96fd608504dcab9520f6a793ffc64946d3afc7059")
+
+        with self.assertRaises(ValueError):
+            ComponentBuildInfo.from_json('{"package_name": "amqstreams-bridge-container"}')
+        with self.assertRaises(ValueError):
+            ComponentBuildInfoRegistry.from_environ({"CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON": "{"})
+
+    def test_missing_component_build_info(self):
+        with self.assertRaisesRegex(ValueError, "^No build info for amqstreams-bridge-container$"):
+            ComponentBuildInfo.of(None, "amqstreams-bridge-container")
+        with self.assertRaisesRegex(ValueError, "^No build info for amqstreams-bridge-container$"):
+            ComponentBuildInfoRegistry({"amqstreams-bridge-container": None})
+        components = BundleAutomation.collect_component_build_info()
+        del components.components["amqstreams-bridge-container"]
+        with self.assertRaisesRegex(ValueError, "^No build info for amqstreams-bridge-container$"):
+            BundleAutomation.create_tag_dict_from_new_csv_format(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data, components)
+
     def test_generate_package_name_from_annotation(self):
         operator_annotation = {"operator-image": "registry.redhat.io/amq-streams/strimzi-rhel9-operator@sha256:95f5aa75cd1f7228e78fd4d88d786713fba4cf828dc22bc2dd1d0380909c1aef"}
         kafka_prev_annotation = {"kafka-previous-image": "registry.redhat.io/amq-streams/kafka-36-rhel9@sha256:177484ebf6f663eedfc558285e4e89e817277389250aec29323452082b6949e4"}
@@ -157,6 +196,295 @@ class TestBundleAutomation(unittest.TestCase):
         self.assertEqual(tag_dict['bridge-rhel9:2.5.0-1'], "bridge-rhel8:2.5.0-5")
         self.assertEqual(tag_dict['maven-builder-rhel9:2.5.0-1'], "maven-builder-rhel8:2.5.0-5")
 
+    def test_cluster_service_version_parsed_once(self):
+        brew_client = Mock()
+        brew_client.listBuilds.return_value = []
+        ClusterServiceVersion.parse_count = 0
+
+        csv = ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+        product_version = BundleAutomation.get_product_version(csv)
+        BundleAutomation.create_tag_dict_from_new_csv_format(csv, BundleAutomation.collect_component_build_info())
+        bundle_versions = BundleAutomation.generate_bundle_version_strings(brew_client, csv, product_version)
+        BundleAutomation.get_bundle_name(csv)
+        BundleAutomation.get_bundle_deployment_name(csv)
+        BundleAutomation.get_skip_range(csv)
+
+        self.assertEqual(bundle_versions, ["2.4.0-0", "2.5.0-0"])
+        self.assertEqual(ClusterServiceVersion.parse_count, 1)
+
+    def _create_brew_session(self):
+        brew_client = FakeKojiSession()
+        for version in ["2.4.0", "2.6.0"]:
+            for release in range(10):
+                brew_client.add_build(constants.METADATA_PACKAGE_NAME, version, release, released=True)
+        for release in range(5):
+            brew_client.add_build(constants.METADATA_PACKAGE_NAME, "2.5.0", release, released=release < 3)
+        brew_client.add_build(constants.OPERATOR_PACKAGE_NAME, "2.5.0", 1)
+        brew_client.add_build(constants.OPERATOR_PACKAGE_NAME, "2.5.0", 2)
+        brew_client.add_build(constants.OPERATOR_PACKAGE_NAME, "2.5.0", 3, state=3)
+        return brew_client
+
+    def test_generate_bundle_version_strings(self):
+        brew_client = self._create_brew_session()
+        csv = ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+
+        bundle_versions = BundleAutomation.generate_bundle_version_strings(brew_client, csv, "2.5.0")
+
+        self.assertEqual(bundle_versions, ["2.5.0-2", "2.5.0-3"])
+        # One query for the builds of the version, one multicall for all their tags
+        self.assertEqual(brew_client.rpcs, ["listBuilds", "multiCall"])
+
+    def test_is_bundle_released(self):
+        brew_client = self._create_brew_session()
+        self.assertTrue(BundleAutomation.is_bundle_released(brew_client, "2.5.0"))
+        self.assertFalse(BundleAutomation.is_bundle_released(brew_client, "2.7.0"))
+
+    def test_get_nvr(self):
+        brew_client = self._create_brew_session()
+        self.assertEqual(BundleAutomation.get_nvr(brew_client, constants.OPERATOR_PACKAGE_NAME, "2.5.0"),
+                         "amqstreams-operator-container-2.5.0-2")
+        with self.assertRaises(ValueError):
+            BundleAutomation.get_nvr(brew_client, constants.OPERATOR_PACKAGE_NAME, "2.7.0")
+
+    def test_build_index_queries_brew_once(self):
+        brew_client = self._create_brew_session()
+        build_index = BuildIndex(brew_client)
+        csv = ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+
+        self.assertTrue(BundleAutomation.is_bundle_released(build_index, "2.5.0"))
+        self.assertEqual(BundleAutomation.generate_bundle_version_strings(build_index, csv, "2.5.0"),
+                         ["2.5.0-2", "2.5.0-3"])
+        self.assertEqual(build_index.count_released(constants.METADATA_PACKAGE_NAME, "2.5.0"), 3)
+        self.assertEqual(build_index.get_latest_nvr(constants.METADATA_PACKAGE_NAME, "2.5.0"),
+                         "amqstreams-bundle-container-2.5.0-4")
+        self.assertEqual(brew_client.rpcs, ["listBuilds", "multiCall"])
+
+    def test_build_index_disk_cache(self):
+        brew_client = self._create_brew_session()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "brew-cache.json")
+            build_index = BuildIndex(brew_client, cache_path)
+            build_index.count_released(constants.METADATA_PACKAGE_NAME, "2.5.0")
+            build_index.save()
+
+            brew_client.rpcs.clear()
+            self.assertEqual(BuildIndex(brew_client, cache_path).count_released(constants.METADATA_PACKAGE_NAME, "2.5.0"), 3)
+            self.assertEqual(brew_client.rpcs, [])
+
+            # Expired cache is ignored
+            BuildIndex(brew_client, cache_path, ttl=-1).count_released(constants.METADATA_PACKAGE_NAME, "2.5.0")
+            self.assertEqual(brew_client.rpcs, ["listBuilds", "multiCall"])
+
+    def _create_component_brew_session(self, latency=0):
+        brew_client = FakeKojiSession(latency=latency)
+        for component in [k for k in os.environ if k.startswith("CONTAINER_BUILDS")]:
+            info = json.loads(os.environ[component])
+            build = brew_client.add_build(info["package_name"], info["version"], info["release"])
+            build["extra"] = info["extra"]
+        return brew_client
+
+    def test_collect_component_build_info_from_brew(self):
+        latency = 0.2
+        brew_client = self._create_component_brew_session(latency)
+        resolver = PullSpecResolver(lambda: brew_client)
+        csv = ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+        package_names = BundleAutomation.get_annotation_package_names(csv)
+
+        start = time.monotonic()
+        components = BundleAutomation.collect_component_build_info_from_brew(resolver, package_names, "2.5.0")
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(sorted(components), sorted(package_names))
+        self.assertEqual(BundleAutomation.create_tag_dict_from_new_csv_format(csv, components),
+                         BundleAutomation.create_tag_dict_from_new_csv_format(csv, BundleAutomation.collect_component_build_info()))
+        # listBuilds + getBuild of each package, all packages looked up at the same time
+        self.assertEqual(len(brew_client.rpcs), 2 * len(package_names))
+        self.assertLess(elapsed, len(brew_client.rpcs) * latency / 2)
+
+    def test_pull_spec_resolver_retries_and_fails_loudly(self):
+        brew_client = self._create_component_brew_session()
+        failures = []
+
+        def get_build(nvr):
+            if nvr not in failures:
+                failures.append(nvr)
+                raise ConnectionError("connection reset")
+            return brew_client.getBuild(nvr)
+
+        session = Mock()
+        session.getBuild.side_effect = get_build
+        resolver = PullSpecResolver(lambda: session, retries=1, backoff=0)
+        nvr = "amqstreams-bridge-container-2.5.0-5"
+
+        self.assertEqual(resolver.get_builds([nvr])[nvr]["nvr"], nvr)
+        self.assertEqual(session.getBuild.call_count, 2)
+
+        session.getBuild.side_effect = ConnectionError("connection reset")
+        with self.assertRaises(ConnectionError):
+            resolver.get_builds([nvr])
+
+    def test_collect_component_build_info_from_brew_without_builds(self):
+        resolver = PullSpecResolver(lambda: self._create_component_brew_session())
+        with self.assertRaisesRegex(ValueError, "amqstreams-unknown-container"):
+            BundleAutomation.collect_component_build_info_from_brew(resolver, ["amqstreams-unknown-container"], "2.5.0")
+
+    def test_csv_rewriter_single_pass(self):
+        data = "\n".join([
+            "image: kafka-35-rhel9:2.5.0-1",
+            "image: kafka-35-rhel9:2.5.0-10",
+            "name: amqstreams.v2.4.0-0",
+        ])
+        # Replacements are never rewritten again and partial versions don't match
+        rewriter = CsvRewriter().replace("pull spec", "kafka-35-rhel9:2.5.0-1", "kafka-35-rhel9:2.4.0-0") \
+                                .replace("version", "2.4.0-0", "2.5.0-0")
+
+        output = rewriter.apply(data)
+
+        self.assertEqual(output, "\n".join([
+            "image: kafka-35-rhel9:2.4.0-0",
+            "image: kafka-35-rhel9:2.5.0-10",
+            "name: amqstreams.v2.5.0-0",
+        ]))
+        self.assertEqual([(change.line, change.rule) for change in rewriter.changes], [(1, "pull spec"), (3, "version")])
+
+    def test_file_write_all(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH)
+            dist_git_path = os.path.join(tmp_dir, "dist-git.clusterserviceversion.yaml")
+            github_path = os.path.join(tmp_dir, "github.clusterserviceversion.yaml")
+            with open(github_path, 'w') as file:
+                file.write(source.data)
+
+            # Identical destinations are left untouched
+            self.assertEqual(source.write_all([dist_git_path, github_path]), [dist_git_path])
+            self.assertEqual(File(dist_git_path).data, source.data)
+            self.assertEqual(source.write_all([dist_git_path, github_path]), [])
+
+            source.data = source.data.replace("2.5.0-0", "2.5.0-1")
+            self.assertEqual(source.write_all([dist_git_path, github_path]), [dist_git_path, github_path])
+            self.assertEqual(File(github_path).data, source.data)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), sorted([os.path.basename(dist_git_path), os.path.basename(github_path)]))
+
+    def test_brew_rpcs_counted(self):
+        brew_client = self._create_brew_session()
+        csv = ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+        counters = instrumentation.INSTRUMENTATION.counters
+        rpcs = counters["brew_rpcs"]
+
+        with instrumentation.span("brew_query"):
+            BundleAutomation.generate_bundle_version_strings(brew_client, csv, "2.5.0")
+
+        self.assertEqual(counters["brew_rpcs"] - rpcs, len(brew_client.rpcs))
+        self.assertEqual(instrumentation.INSTRUMENTATION.spans[-1]["name"], "brew_query")
+
+    def test_failed_brew_query_skips_rewrite(self):
+        brew_client = self._create_brew_session()
+        rewrites = []
+
+        def fail():
+            raise RuntimeError("Brew unavailable")
+
+        stages = pipeline.Pipeline()
+        stages.add("parse", lambda: ClusterServiceVersion(File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data))
+        stages.add("brew_query/bundle_versions",
+                   lambda csv: BundleAutomation.generate_bundle_version_strings(brew_client, csv, "2.5.0"),
+                   inputs=["parse"])
+        stages.add("brew_query/components", fail)
+        stages.add("csv_rewrite", lambda *results: rewrites.append(results),
+                   inputs=["brew_query/components", "brew_query/bundle_versions"])
+
+        with self.assertRaisesRegex(RuntimeError, "Brew unavailable"):
+            stages.run()
+
+        self.assertEqual(rewrites, [])
+        self.assertEqual(stages.results["brew_query/bundle_versions"], ["2.5.0-2", "2.5.0-3"])
+        statuses = {entry["name"]: entry["status"] for entry in stages.trace}
+        self.assertEqual(statuses["csv_rewrite"], "skipped")
+
+    def _run_update_bundle(self, brew_client, tmp_dir, **settings):
+        environ = dict(DIST_GIT_CSV_FILE_PATH=os.path.join(tmp_dir, "dist-git.clusterserviceversion.yaml"),
+                       GIT_HUB_CSV_FILE_PATH=os.path.join(tmp_dir, "github.clusterserviceversion.yaml"), **settings)
+        File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).write_all([environ['DIST_GIT_CSV_FILE_PATH'],
+                                                                    environ['GIT_HUB_CSV_FILE_PATH']])
+        sessions = []
+
+        def create_session(opts=None):
+            sessions.append(opts)
+            return brew_client
+
+        stages = bundle_update.create_pipeline(environ, create_session)
+        try:
+            stages.run()
+        finally:
+            statuses = {entry["name"]: entry["status"] for entry in stages.trace}
+        return stages, statuses, sessions
+
+    def test_update_bundle_pipeline(self):
+        brew_client = self._create_brew_session()
+        data = File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data
+        tag_dict = BundleAutomation.create_tag_dict_from_new_csv_format(data, BundleAutomation.collect_component_build_info())
+        expected = BundleAutomation.update_cluster_service_version_data(data, ["2.5.0-2", "2.5.0-3"], tag_dict)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stages, statuses, sessions = self._run_update_bundle(brew_client, tmp_dir)
+
+            self.assertEqual(stages.results["parse"][2], "2.5.0")
+            self.assertEqual(stages.results["brew_query/bundle_versions"], ["2.5.0-2", "2.5.0-3"])
+            self.assertEqual(set(statuses.values()), {"done"})
+            for name in ["dist-git.clusterserviceversion.yaml", "github.clusterserviceversion.yaml"]:
+                self.assertEqual(File(os.path.join(tmp_dir, name)).data, expected)
+        # Every build info is provided, only the build index talks to Brew
+        self.assertEqual(sessions, [None])
+        self.assertEqual(brew_client.rpcs, ["listBuilds", "multiCall"])
+
+    def test_update_bundle_pipeline_fails_on_missing_build_info(self):
+        brew_client = self._create_brew_session()
+        build_info = os.environ.pop("CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON")
+        self.addCleanup(os.environ.__setitem__, "CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON", build_info)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaisesRegex(ValueError, "amqstreams-bridge-container"):
+                self._run_update_bundle(brew_client, tmp_dir)
+            # Nothing is rewritten, the bundle versions are still queried
+            self.assertEqual(File(os.path.join(tmp_dir, "dist-git.clusterserviceversion.yaml")).data,
+                             File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data)
+
+    def test_update_bundle_pipeline_brew_component_fallback(self):
+        brew_client = self._create_component_brew_session()
+        for build in self._create_brew_session().builds:
+            brew_client.add_build(build['package_name'], build['version'], build['release'], released=True,
+                                  state=build['state'])
+        build_info = os.environ.pop("CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON")
+        self.addCleanup(os.environ.__setitem__, "CONTAINER_BUILDS_BRIDGE_BUILD_INFO_JSON", build_info)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stages, statuses, sessions = self._run_update_bundle(brew_client, tmp_dir, BREW_COMPONENT_FALLBACK="true",
+                                                                 BREW_TIMEOUT="5", BREW_WORKERS="1")
+
+        self.assertEqual(set(statuses.values()), {"done"})
+        self.assertIn("amqstreams-bridge-container", stages.results["brew_query/components"])
+        # The build index session, then sessions with a timeout for the component lookups
+        self.assertIsNone(sessions[0])
+        self.assertEqual(sessions[1:], [{'timeout': 5}] * (len(sessions) - 1))
+        self.assertGreater(len(sessions), 1)
+
+    def test_update_bundle_pipeline_compacts_crds_after_write(self):
+        brew_client = self._create_brew_session()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "kafkas.kafka.strimzi.io.crd.yaml"), 'w') as file:
+                file.write("kind: CustomResourceDefinition\nmetadata:\n  name: kafkas.kafka.strimzi.io\n")
+            output_dir = os.path.join(tmp_dir, "compacted")
+
+            stages, statuses, _ = self._run_update_bundle(brew_client, tmp_dir, CRD_COMPACT_OUTPUT_DIR=output_dir)
+
+            self.assertEqual(statuses["crd_compact"], "done")
+            self.assertEqual(os.listdir(output_dir), ["kafkas.kafka.strimzi.io.crd.yaml"])
+            self.assertEqual(stages.stages["crd_compact"].after, ["write"])
+
+            # Compacting into the manifests directory is rejected before anything runs
+            with self.assertRaises(ValueError):
+                self._run_update_bundle(brew_client, tmp_dir, CRD_COMPACT_OUTPUT_DIR=tmp_dir)
+
     def test_update_cluster_service_version_data(self):
         data = File(self.NEW_CSV_INTERNAL_PULL_SPECS_FILE_PATH).data
         bundle_versions=["2.4.0-0", "2.5.0-0"]
@@ -0,0 +1,21 @@
+import unittest
+
+from automation.benchmarks import bundle_benchmark
+
+
+class TestBundleBenchmark(unittest.TestCase):
+
+    def test_run_benchmark(self):
+        results = bundle_benchmark.run_benchmark(respins=[3], images=[2], latency=0, repeat=1)["results"]
+
+        self.assertEqual([result["stage"] for result in results],
+                         ["generate_bundle_version_strings",
+                          "create_tag_dict_from_new_csv_format",
+                          "update_cluster_service_version_data"])
+        self.assertEqual(results[0]["bundle_versions"], ["2.5.0-2", "2.5.0-3"])
+        # 5 test images plus the 2 synthetic Kafka images
+        self.assertEqual(results[1]["tags"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
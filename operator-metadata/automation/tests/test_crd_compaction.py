@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from automation.modules import crd_compaction
+from automation.modules.crd_compaction import CrdCompactor
+
+SCHEMA = {
+    "openAPIV3Schema": {
+        "type": "object",
+        "description": "A topic",
+        "properties": {
+            "description": {"type": "string", "description": "Property named description"},
+            "affinity": {"type": "object", "description": "PodAffinity" * 30,
+                         "properties": {"nodeAffinity": {"type": "object", "x-kubernetes-preserve-unknown-fields": True}}},
+        },
+    }
+}
+
+CRD = {
+    "apiVersion": "apiextensions.k8s.io/v1",
+    "kind": "CustomResourceDefinition",
+    "metadata": {"name": "kafkatopics.kafka.strimzi.io"},
+    "spec": {
+        "group": "kafka.strimzi.io",
+        "versions": [{"name": version, "served": True, "schema": json.loads(json.dumps(SCHEMA))}
+                     for version in ["v1beta2", "v1beta1"]],
+    },
+}
+# Both versions have their own copy of the schema, the YAML has no aliases
+CRD_YAML = yaml.safe_dump(CRD, sort_keys=False)
+
+
+class TestCrdCompaction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manifests_dir = self.tmp_dir.name
+        self.path = os.path.join(self.manifests_dir, "kafkatopics.kafka.strimzi.io.crd.yaml")
+        with open(self.path, 'w') as file:
+            file.write(CRD_YAML)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_strip_descriptions(self):
+        schema = crd_compaction.strip_descriptions(SCHEMA)["openAPIV3Schema"]
+
+        self.assertNotIn("description", schema)
+        self.assertEqual(schema["properties"]["description"], {"type": "string"})
+        self.assertNotIn("description", schema["properties"]["affinity"])
+
+    def test_identical_schemas_are_written_once(self):
+        self.assertEqual(CRD_YAML.count("PodAffinity" * 30), 2)
+
+        name, compacted = CrdCompactor().compact(CRD_YAML)
+
+        self.assertEqual(name, "kafkatopics.kafka.strimzi.io")
+        self.assertEqual(compacted.count(b"PodAffinity" * 30), 1)
+        self.assertEqual(yaml.safe_load(compacted), CRD)
+
+    def test_compact_directory(self):
+        output_dir = os.path.join(self.manifests_dir, "compacted")
+        compactor = CrdCompactor("min-yaml", strip_descriptions=True)
+
+        results = compactor.compact_directory(self.manifests_dir, output_dir)
+
+        self.assertEqual(len(results), 1)
+        self.assertLess(results[0].compacted_size, results[0].original_size)
+        with open(results[0].path, 'r') as file:
+            self.assertEqual(len(file.read().splitlines()), 1)
+        report_path = os.path.join(self.manifests_dir, "report.json")
+        CrdCompactor.write_report(results, report_path)
+        with open(report_path, 'r') as file:
+            self.assertEqual(json.load(file)[0]["name"], "kafkatopics.kafka.strimzi.io")
+
+    def test_compact_directory_to_json(self):
+        output_dir = os.path.join(self.manifests_dir, "compacted")
+        CrdCompactor("json").compact_directory(self.manifests_dir, output_dir)
+
+        self.assertEqual(os.listdir(output_dir), ["kafkatopics.kafka.strimzi.io.crd.json"])
+        with open(os.path.join(output_dir, "kafkatopics.kafka.strimzi.io.crd.json"), 'r') as file:
+            self.assertEqual(json.load(file), CRD)
+
+    def test_compact_in_place_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CrdCompactor("json").compact_directory(self.manifests_dir, os.path.join(self.manifests_dir, "."))
+
+        self.assertEqual(os.listdir(self.manifests_dir), ["kafkatopics.kafka.strimzi.io.crd.yaml"])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            CrdCompactor("xml")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from automation.modules import crd_sync
+from automation.modules.crd_sync import CrdSync
+
+CRD = """apiVersion: apiextensions.k8s.io/v1
+kind: CustomResourceDefinition
+spec:
+  versions:
+  - name: v1beta2
+    served: true
+metadata:
+  labels:
+    name: not-the-name
+  name: {name}
+"""
+
+
+class TestCrdSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.tmp_dir.name, "install")
+        self.target_dir = os.path.join(self.tmp_dir.name, "manifests")
+        os.makedirs(self.source_dir)
+        os.makedirs(self.target_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, path, contents):
+        with open(path, 'w') as file:
+            file.write(contents)
+
+    def read(self, path):
+        with open(path, 'r') as file:
+            return file.read()
+
+    def test_get_crd_name(self):
+        self.assertEqual(crd_sync.get_crd_name(CRD.format(name="kafkas.kafka.strimzi.io")), "kafkas.kafka.strimzi.io")
+        self.assertIsNone(crd_sync.get_crd_name("kind: CustomResourceDefinition\n"))
+
+    def test_sync(self):
+        self.write(os.path.join(self.source_dir, "040-Crd-kafka.yaml"), CRD.format(name="kafkas.kafka.strimzi.io"))
+        self.write(os.path.join(self.source_dir, "043-Crd-kafkatopic.yaml"), CRD.format(name="kafkatopics.kafka.strimzi.io"))
+        self.write(os.path.join(self.source_dir, "044-Crd-kafkauser.yaml"), CRD.format(name="kafkausers.kafka.strimzi.io"))
+        self.write(os.path.join(self.source_dir, "050-ConfigMap-strimzi-cluster-operator.yaml"), "kind: ConfigMap\n")
+        # Same CRD with different formatting, an outdated one and one without install file
+        formatted = CRD.format(name="kafkas.kafka.strimzi.io").replace("served: true", "served:   true")
+        self.write(os.path.join(self.target_dir, "kafkas.kafka.strimzi.io.crd.yaml"), formatted)
+        self.write(os.path.join(self.target_dir, "kafkatopics.kafka.strimzi.io.crd.yaml"),
+                   CRD.format(name="kafkatopics.kafka.strimzi.io").replace("true", "false"))
+        self.write(os.path.join(self.target_dir, "strimzipodsets.core.strimzi.io.crd.yaml"),
+                   CRD.format(name="strimzipodsets.core.strimzi.io"))
+        sync = CrdSync(self.source_dir, self.target_dir)
+
+        results = sync.sync(check=True)
+
+        self.assertEqual({result.name: result.status for result in results}, {
+            "kafkas.kafka.strimzi.io": crd_sync.FORMATTING_ONLY,
+            "kafkatopics.kafka.strimzi.io": crd_sync.OUT_OF_SYNC,
+            "kafkausers.kafka.strimzi.io": crd_sync.MISSING,
+            "strimzipodsets.core.strimzi.io": crd_sync.NO_SOURCE,
+        })
+        self.assertFalse(CrdSync.is_in_sync(results))
+        self.assertFalse(os.path.exists(os.path.join(self.target_dir, "kafkausers.kafka.strimzi.io.crd.yaml")))
+
+        results = sync.sync()
+
+        self.assertEqual([result.status for result in results],
+                         [crd_sync.FORMATTING_ONLY, crd_sync.UPDATED, crd_sync.CREATED, crd_sync.NO_SOURCE])
+        self.assertEqual(self.read(os.path.join(self.target_dir, "kafkas.kafka.strimzi.io.crd.yaml")), formatted)
+        self.assertEqual(self.read(os.path.join(self.target_dir, "kafkatopics.kafka.strimzi.io.crd.yaml")),
+                         self.read(os.path.join(self.source_dir, "043-Crd-kafkatopic.yaml")))
+        self.assertEqual(self.read(os.path.join(self.target_dir, "kafkausers.kafka.strimzi.io.crd.yaml")),
+                         self.read(os.path.join(self.source_dir, "044-Crd-kafkauser.yaml")))
+        self.assertTrue(CrdSync.is_in_sync(sync.sync(check=True)))
+
+    def test_sync_rejects_unmatchable_files(self):
+        self.write(os.path.join(self.source_dir, "040-Crd-kafka.yaml"), CRD.format(name="kafkas.kafka.strimzi.io"))
+        self.write(os.path.join(self.target_dir, "kafkas.kafka.strimzi.io.crd.yaml"), CRD.format(name="kafkas.kafka.strimzi.io"))
+        # A copy under another file name would silently shadow the other one
+        self.write(os.path.join(self.target_dir, "kafkas-copy.crd.yaml"), CRD.format(name="kafkas.kafka.strimzi.io"))
+        self.write(os.path.join(self.target_dir, "broken.crd.yaml"), "kind: CustomResourceDefinition\n")
+        sync = CrdSync(self.source_dir, self.target_dir)
+
+        with self.assertRaises(ValueError) as error:
+            sync.sync()
+
+        self.assertIn("broken.crd.yaml has no metadata.name", str(error.exception))
+        self.assertIn("are both named kafkas.kafka.strimzi.io", str(error.exception))
+        self.assertIn("kafkas-copy.crd.yaml", str(error.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()